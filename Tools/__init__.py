@@ -1,8 +1,13 @@
 from .tool_registry import auto_load_tools, ToolRegistry
+from .model_residency import residency
 
-auto_load_tools()
+# Os workers do pool de processos (ToolRegistry.run_in_worker) importam este pacote de novo
+# ao iniciar; eles só executam funções, então não precisam instanciar as ferramentas
+if not ToolRegistry.is_worker_process():
+    auto_load_tools()
 
 __all__ = [
     'auto_load_tools', 
     'ToolRegistry',
+    'residency',
 ]
\ No newline at end of file
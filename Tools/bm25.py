@@ -0,0 +1,73 @@
+"""
+Pontuação lexical BM25 em NumPy, usada como pré-filtro barato antes dos embeddings
+
+Só as palavras da busca importam, então a matriz de frequências tem uma coluna por termo
+da busca (não pelo vocabulário inteiro) e é montada de uma vez com `np.add.at`.
+"""
+
+from typing import Sequence
+import numpy as np
+import unicodedata
+import re
+
+K1 = 1.5
+B = 0.75
+# Prefixo de 6 letras funciona como um stemmer barato ("economia"/"econômico" -> "econom")
+STEM_PREFIX = 6
+TOKEN = re.compile(r'\w+')
+
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acento"""
+    folded = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in folded if not unicodedata.combining(char))
+
+
+# Palavras que aparecem em quase todo texto e só atrapalham a contagem
+# (sem acento, como os tokens chegam na comparação: "não" vira "nao")
+STOPWORDS = frozenset(_fold(
+    'a o as os um uma uns umas de da do das dos em na no nas nos por para com sem sob sobre e ou '
+    'que se como mais mas não ao aos à às é ser foi são ter tem the of and or to in on for with is are'
+).split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Minúsculas, sem acento, sem stopwords e truncado em `STEM_PREFIX` letras"""
+    return [token[:STEM_PREFIX] for token in TOKEN.findall(_fold(text)) if token not in STOPWORDS]
+
+
+def bm25_scores(query: str, documents: Sequence[str], k1: float = K1, b: float = B) -> np.ndarray:
+    """Pontuação BM25 de cada documento para a consulta (zeros se não houver nenhum termo em comum)"""
+    terms = {term: column for column, term in enumerate(dict.fromkeys(tokenize(query)))}
+    scores = np.zeros(len(documents), dtype=np.float32)
+    if not terms or not documents:
+        return scores
+
+    lengths = np.empty(len(documents), dtype=np.float32)
+    rows, columns = [], []
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        lengths[row] = len(tokens)
+        for token in tokens:
+            if (column := terms.get(token)) is not None:
+                rows.append(row)
+                columns.append(column)
+
+    tf = np.zeros((len(documents), len(terms)), dtype=np.float32)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), 1)
+
+    n = len(documents)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()), 1e-9))
+    scores = (tf * (k1 + 1) / (tf + norm[:, None])) @ idf
+    return scores.astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> list[int]:
+    """Índices das `k` maiores pontuações, da maior para a menor"""
+    if not len(scores):
+        return []
+    k = min(k, len(scores))
+    top = np.argpartition(scores, -k)[-k:]
+    return top[np.argsort(scores[top])[::-1]].tolist()
@@ -0,0 +1,178 @@
+"""
+Cache persistente de embeddings, indexado por (modelo, hash do texto)
+
+Os vetores float32 ficam num arquivo só de acréscimo (lido via memmap) e o índice num SQLite.
+Quando passa do limite de tamanho, as entradas menos usadas recentemente são descartadas
+e as restantes são copiadas para um arquivo novo (uma nova "geração"); a troca de geração
+e dos offsets acontece na mesma transação, então uma queda no meio nunca mistura os dois.
+"""
+
+from pathlib import Path
+from typing import Callable, Optional
+from config import config
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import time
+
+CACHE_DIR = Path(__file__).parent.parent / 'cache'
+# Ao estourar o limite, descarta até ficar nessa fração dele (evita compactar a cada inserção)
+EVICTION_TARGET = 0.8
+
+
+class EmbeddingCache:
+    """Cache de embeddings em disco com despejo LRU e estatísticas de acerto."""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_mb: Optional[float] = None):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int((max_mb if max_mb is not None else config.get('advanced.embedding_cache.max_mb', 256)) * 1024 ** 2)
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._mapped: Optional[np.memmap] = None
+
+        self._conn = sqlite3.connect(self.directory / 'embeddings.db', check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                dim INTEGER NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, hash)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)')
+        self._conn.commit()
+
+        self.generation = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        self.vectors_path.touch(exist_ok=True)
+
+    def _vectors_file(self, generation: int) -> Path:
+        return self.directory / f'embeddings.{generation}.f32'
+
+    @property
+    def vectors_path(self) -> Path:
+        return self._vectors_file(self.generation)
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        """Acertos/erros desta sessão, entradas e tamanho em disco"""
+        entries = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'entries': entries,
+            'size_mb': self.vectors_path.stat().st_size / 1024 ** 2,
+        }
+
+    def _read(self, offset: int, dim: int) -> np.ndarray:
+        """Lê um vetor pelo offset (em floats), remapeando o arquivo se ele cresceu"""
+        if self._mapped is None or offset + dim > len(self._mapped):
+            self._mapped = np.memmap(self.vectors_path, dtype=np.float32, mode='r')
+        return np.array(self._mapped[offset:offset + dim])
+
+    def get_or_embed(self, model: str, texts: list[str], embed: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """Retorna a matriz (len(texts), dim), chamando `embed` só para os textos fora do cache"""
+        hashes = [self._hash(text) for text in texts]
+
+        with self._lock:
+            found: dict[str, tuple[int, int]] = {}
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, offset, dim FROM embeddings WHERE model = ? AND hash IN ({', '.join('?' for _ in batch)})",
+                    (model, *batch)
+                ).fetchall()
+                found.update((h, (offset, dim)) for h, offset, dim in rows)
+
+            vectors: list[Optional[np.ndarray]] = [
+                self._read(*found[h]) if h in found else None for h in hashes
+            ]
+            now = int(time.time())
+            self._conn.executemany(
+                'UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?',
+                [(now, model, h) for h in found]
+            )
+            self._conn.commit()
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            computed = np.asarray(embed([texts[i] for i in missing]), dtype=np.float32)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            self._store(model, [hashes[i] for i in missing], computed)
+
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _store(self, model: str, hashes: list[str], vectors: np.ndarray):
+        with self._lock:
+            # Grava os vetores primeiro: se cair no meio, sobram bytes órfãos (limpos na compactação)
+            with open(self.vectors_path, 'ab') as f:
+                offset = f.tell() // 4
+                f.write(vectors.astype(np.float32).tobytes())
+
+            dim = vectors.shape[1]
+            now = int(time.time())
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embeddings (model, hash, offset, dim, last_used) VALUES (?, ?, ?, ?, ?)',
+                [(model, h, offset + i * dim, dim, now) for i, h in enumerate(hashes)]
+            )
+            self._conn.commit()
+
+            if self.vectors_path.stat().st_size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Descarta as entradas menos usadas e copia as restantes para a próxima geração do arquivo"""
+        rows = self._conn.execute(
+            'SELECT model, hash, offset, dim, last_used FROM embeddings ORDER BY last_used DESC'
+        ).fetchall()
+
+        keep, size = [], 0
+        for row in rows:
+            size += row[3] * 4
+            if size > self.max_bytes * EVICTION_TARGET:
+                break
+            keep.append(row)
+
+        old_path = self.vectors_path
+        new_generation = self.generation + 1
+        updated, position = [], 0
+        with open(self._vectors_file(new_generation), 'wb') as f:
+            for model, h, offset, dim, last_used in keep:
+                f.write(self._read(offset, dim).tobytes())
+                updated.append((model, h, position, dim, last_used))
+                position += dim
+
+        with self._conn:
+            self._conn.execute('DELETE FROM embeddings')
+            self._conn.executemany(
+                'INSERT INTO embeddings (model, hash, offset, dim, last_used) VALUES (?, ?, ?, ?, ?)',
+                updated
+            )
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (new_generation,))
+
+        self.generation = new_generation
+        self._mapped = None
+        try:
+            old_path.unlink()
+        except OSError:
+            pass
@@ -5,13 +5,30 @@ Escrita originalmente por Arthur (Desenvolvedor original)
 """
 
 from .tool_registry import tool
-from typing import Optional, Literal
+from .summarizer import MapReduceSummarizer
+from .sandbox_index import SandboxIndex
+from typing import BinaryIO, Callable, Iterator, Optional, Literal
+from collections import deque
 from config import config
 from pathlib import Path
-import lmstudio as lms
+from datetime import datetime
+import threading
+import fnmatch
+import codecs
+import shutil
+import mmap
 import os
+import re
 
 FILE_SANDBOX = Path(__file__).parent.parent / 'file_sandbox'
+# A partir deste tamanho os arquivos são lidos com mmap: só as páginas tocadas vão para a memória
+MMAP_THRESHOLD = 1 << 20
+# Teto de caracteres devolvidos por uma leitura parcial ou busca
+MAX_SLICE_CHARS = 8000
+# Linhas muito longas (minificados, CSV largo) são cortadas nas buscas
+MAX_LINE_CHARS = 300
+# Em arquivos mapeados, guarda o deslocamento de uma linha a cada N para pular direto até ela
+LINE_INDEX_STEP = 1000
 
 class FileManager:
     def __init__(self):
@@ -22,13 +39,145 @@ class FileManager:
                            Se None, usa 'file_sandbox' no diretório atual.
         """
         FILE_SANDBOX.mkdir(parents=True, exist_ok=True)
+        # caminho -> ((mtime_ns, tamanho), deslocamentos das linhas 1, 1 + STEP, 1 + 2*STEP...)
+        self._line_index: dict[Path, tuple[tuple[int, int], list[int]]] = {}
+        self.summarizer = MapReduceSummarizer()
+        self.index = SandboxIndex(FILE_SANDBOX)
 
-    def _read_file(self, name: str | Path) -> str:
-        """Lê o conteúdo de um arquivo."""
+    def _sandbox_path(self, name: str | Path) -> Path:
+        """Caminho absoluto dentro do sandbox; recusa nomes que escapam dele (../, caminhos absolutos)."""
+        root = FILE_SANDBOX.resolve()
+        path = (root / name).resolve()
+        if root not in path.parents:
+            raise ValueError(f'{name} fica fora do sandbox')
+        return path
+
+    def _line_offset(self, path: Path, mm: mmap.mmap, line: int) -> int:
+        """Deslocamento em bytes do início da linha `line` (começando em 1), ou -1 se o arquivo acabar antes."""
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._line_index.get(path)
+        if cached is None or cached[0] != key:
+            cached = self._line_index[path] = (key, [0])
+        checkpoints = cached[1]
+
+        # Começa do ponto de controle mais próximo e segue procurando '\n', anotando os novos pontos
+        k = min((line - 1) // LINE_INDEX_STEP, len(checkpoints) - 1)
+        offset, current = checkpoints[k], k * LINE_INDEX_STEP + 1
+        while current < line:
+            newline = mm.find(b'\n', offset)
+            if newline < 0:
+                return -1
+            offset = newline + 1
+            current += 1
+            if (current - 1) == len(checkpoints) * LINE_INDEX_STEP:
+                checkpoints.append(offset)
+        return offset if offset < len(mm) else -1
+
+    def _iter_lines(self, path: Path, start: int = 1) -> Iterator[tuple[int, str]]:
+        """Gera (número, linha) a partir de `start` sem carregar o arquivo inteiro."""
+        if path.stat().st_size >= MMAP_THRESHOLD:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = self._line_offset(path, mm, start)
+                if offset < 0:
+                    return
+                mm.seek(offset)
+                number = start
+                while raw := mm.readline():
+                    yield number, raw.decode('utf-8', errors='replace').rstrip('\r\n')
+                    number += 1
+            return
+
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for number, line in enumerate(f, 1):
+                if number >= start:
+                    yield number, line.rstrip('\r\n')
+
+    def _read_bytes(self, path: Path, start: int, length: int) -> tuple[str, int, int]:
+        """Decodifica `length` bytes a partir de `start` sem cortar caracteres UTF-8 ao meio.
+
+        Returns:
+            (texto, deslocamento do primeiro byte decodificado, deslocamento logo após o último)
+        """
+        size = path.stat().st_size
+        if size >= MMAP_THRESHOLD:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[start:start + length + 3]
+        else:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                data = f.read(length + 3)
+
+        # Pula bytes de continuação no começo (o caractere começou antes de `start`)
+        skip = 0
+        while skip < min(3, len(data)) and 0x80 <= data[skip] <= 0xBF:
+            skip += 1
+        data = data[skip:skip + length]
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        end_of_file = start + skip + len(data) >= size
+        text = decoder.decode(data, final=end_of_file)
+        # Bytes de um caractere incompleto no fim ficam para a próxima leitura
+        pending = len(decoder.getstate()[0])
+        return text, start + skip, start + skip + len(data) - pending
+
+    def _grep(self, path: Path, regex: re.Pattern, context: int) -> Iterator[Optional[tuple[int, str, bool]]]:
+        """Gera (número, linha, é_ocorrência) das linhas encontradas e do contexto ao redor; None separa blocos."""
+        before: deque[tuple[int, str]] = deque(maxlen=context)
+        after = 0
+        last = 0
+        for number, line in self._iter_lines(path):
+            if regex.search(line):
+                if last and (before[0][0] if before else number) > last + 1:
+                    yield None
+                for item in before:
+                    yield *item, False
+                before.clear()
+                yield number, line, True
+                after = context
+                last = number
+            elif after:
+                yield number, line, False
+                after -= 1
+                last = number
+            else:
+                before.append((number, line))
+
+    def _rewrite(self, path: Path, write: Callable[[BinaryIO], None]):
+        """Gera o conteúdo novo num temporário ao lado do arquivo e troca de uma vez (os.replace).
+
+        Quem lê ao mesmo tempo vê o arquivo antigo ou o novo, nunca um pela metade; se algo
+        falhar no meio, o original fica intacto.
+        """
+        temp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(temp, 'wb') as out:
+                write(out)
+            shutil.copymode(path, temp)
+            os.replace(temp, path)
+        finally:
+            temp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _newline(path: Path) -> bytes:
+        """Quebra de linha usada no arquivo (CRLF ou LF), olhando a primeira linha."""
+        with open(path, 'rb') as f:
+            first = f.readline()
+        return b'\r\n' if first.endswith(b'\r\n') else b'\n'
+
+    @staticmethod
+    def _ends_with_newline(path: Path) -> bool:
+        with open(path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _read_file(self, name: str | Path, limit: int = -1) -> str:
+        """Lê o conteúdo de um arquivo (no máximo `limit` caracteres, se informado)."""
         try:
             FILE_SANDBOX.mkdir(exist_ok=True)
             with open(FILE_SANDBOX / name, 'r', encoding='utf-8') as f:
-                conteudo = f.read()
+                conteudo = f.read(limit)
             return conteudo
         except FileNotFoundError:
             return f'Erro: Arquivo {name} não encontrado.'
@@ -53,58 +202,90 @@ class FileManager:
             resultado.append("\n".join(erros))
         return "\n".join(resultado) if resultado else "Nenhum arquivo foi processado."
 
-    def _list_files(self) -> str:
-        """Lista todos os arquivos no sandbox."""
+    def _scan(self, pattern: str) -> Iterator[tuple[str, int, float]]:
+        """Gera (caminho relativo, tamanho, mtime) dos arquivos do sandbox que casam com o padrão.
+
+        Percorre subpastas com os.scandir (o tamanho e a data vêm da própria entrada do
+        diretório). Padrões com "/" são comparados com o caminho relativo; os outros, só com o nome.
+        """
+        FILE_SANDBOX.mkdir(exist_ok=True)
+        pending = [(FILE_SANDBOX, '')]
+        while pending:
+            directory, prefix = pending.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Ocultos (inclui os temporários das edições atômicas)
+                    if entry.name.startswith('.'):
+                        continue
+                    relative = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, relative + '/'))
+                    elif entry.is_file():
+                        if fnmatch.fnmatch(relative if '/' in pattern else entry.name, pattern):
+                            stat = entry.stat()
+                            yield relative, stat.st_size, stat.st_mtime
+
+    @staticmethod
+    def _format_size(size: int) -> str:
+        for unit in ('B', 'KB', 'MB'):
+            if size < 1024:
+                return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+            size /= 1024
+        return f'{size:.1f} GB'
+
+    def _list_files(
+        self, pattern: str = '*', order: Literal['nome', 'tamanho', 'data'] = 'nome', offset: int = 0, limit: int = 50
+    ) -> str:
+        """Lista uma página dos arquivos do sandbox, com tamanho, data e o total encontrado."""
         try:
-            FILE_SANDBOX.mkdir(exist_ok=True)
-            arquivos = os.listdir(FILE_SANDBOX)
-            if arquivos:
-                return "Arquivos:\n" + "\n".join(f"- {arquivo}" for arquivo in arquivos)
+            files = list(self._scan(pattern or '*'))
+            if not files:
+                return 'Diretório vazio.' if pattern in ('', '*') else f'Nenhum arquivo corresponde a {pattern}.'
+
+            # Tamanho e data do maior/mais recente para o menor/mais antigo
+            if order == 'tamanho':
+                files.sort(key=lambda file: (-file[1], file[0]))
+            elif order == 'data':
+                files.sort(key=lambda file: (-file[2], file[0]))
             else:
-                return 'Diretório vazio.'
+                files.sort(key=lambda file: file[0].lower())
+
+            offset = max(0, offset)
+            page = files[offset:offset + max(1, limit)]
+            if not page:
+                return f'Só há {len(files)} arquivo(s) com {pattern}; use um offset menor.'
+            linhas = [
+                f'- {name}  {self._format_size(size)}  {datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M}'
+                for name, size, mtime in page
+            ]
+            cabecalho = f'Arquivos {offset + 1}-{offset + len(page)} de {len(files)} (padrão {pattern}, por {order}):'
+            if offset + len(page) < len(files):
+                linhas.append(f'[... mais {len(files) - offset - len(page)}; use offset={offset + len(page)} ou um padrão mais específico]')
+            return cabecalho + '\n' + '\n'.join(linhas)
         except Exception as e:
             return f'Erro ao listar arquivos: {e}'
 
     def _summarize_file(self, name: str, foco: Optional[str]) -> str:
-        """Lê um arquivo e gera um resumo."""
+        """Resume um arquivo inteiro (map-reduce, com os resumos parciais em cache)."""
         try:
-            conteudo = self._read_file(name)
-            if conteudo.startswith('Erro'):
-                return conteudo
-            if len(conteudo.strip()) < 200:
-                return f'Conteúdo muito curto. Conteúdo: {conteudo[:200]}'
-            
-            # Gerenciamento de memória
-            modelos_carregados = []
-            try:
-                modelos_carregados = lms.list_loaded_models()
-                for modelo in modelos_carregados:
-                    lms.llm(modelo.identifier).unload()
-            except Exception:
-                pass
+            path = self._sandbox_path(name)
+            if path.stat().st_size < 200:
+                conteudo = path.read_text(encoding='utf-8', errors='replace')
+                if len(conteudo.strip()) < 200:
+                    return f'Conteúdo muito curto. Conteúdo: {conteudo}'
 
             try:
-                resumo_llm = lms.llm(config.get('models.file_summarizer'))
-                prompt = f"""Resuma concisamente o conteúdo abaixo do arquivo '{name}':
----
-{conteudo[:35000]}
----
-Forneça um resumo claro em 2-3 parágrafos"""
-                prompt += f' focando em "{foco}".' if foco else '.'
-                
-                resumo = resumo_llm.respond(prompt)
-                resumo_llm.unload()
-                
-                # Recarrega modelos
-                for modelo in modelos_carregados:
-                    try:
-                        lms.llm(modelo.identifier)
-                    except Exception:
-                        pass
-                        
-                return f'Resumo de {name}:\n{resumo}'
+                # Gerenciador mantém o resumidor carregado e só descarrega outros modelos se faltar memória
+                resumo, omitido = self.summarizer.summarize_file(config.get('models.file_summarizer'), path, name, foco)
+                resultado = f'Resumo de {name}:\n{resumo}'
+                if omitido:
+                    resultado += (f'\n\n(O resumo cobre só até a linha {omitido - 1}; '
+                                  f'use ler_linhas com inicio={omitido} ou buscar_em_arquivo para o resto.)')
+                return resultado
             except Exception as e:
                 return f'Erro ao gerar resumo: {e}'
+        except FileNotFoundError:
+            return f'Erro: Arquivo {name} não encontrado.'
         except Exception as e:
             return f'Erro ao resumir arquivo: {e}'
 
@@ -113,6 +294,7 @@ Forneça um resumo claro em 2-3 parágrafos"""
         """Cria um novo arquivo (ou sobrescreve) no sandbox.
         
         Use para salvar códigos, notas, listas ou qualquer texto gerado.
+        Para mudar um arquivo que já existe, use as ferramentas de edição em vez de recriá-lo.
         Nomes de arquivos não podem conter "/" assim como em qualquer sistema operacional.
         
         Args:
@@ -125,7 +307,8 @@ Forneça um resumo claro em 2-3 parágrafos"""
             if full_path.exists():
                 current = full_path.read_text(encoding='utf-8')
                 preview = current if len(current) < 200 else current[:200] + '[...]'
-                return f'Arquivo já existe! Conteúdo: {preview}'
+                return (f'Arquivo já existe! Conteúdo: {preview}\n'
+                        f'Para alterá-lo use acrescentar_ao_arquivo, inserir_no_arquivo ou substituir_no_arquivo.')
             
             full_path.write_text(conteudo or '', encoding='utf-8')
             return f'Arquivo {nome} criado com sucesso!'
@@ -137,40 +320,334 @@ Forneça um resumo claro em 2-3 parágrafos"""
         except Exception as e:
             return f'Erro inesperado ao criar arquivo {nome}: {e}'
 
+    @tool
+    def acrescentar_ao_arquivo(self, nome: str, conteudo: str) -> str:
+        """Acrescenta texto ao fim de um arquivo existente, sem reescrevê-lo.
+        
+        Args:
+            nome: Nome do arquivo.
+            conteudo: Texto a acrescentar (começa numa linha nova).
+        """
+        try:
+            path = self._sandbox_path(nome)
+            newline = self._newline(path)
+            data = conteudo.replace('\r\n', '\n').encode('utf-8').replace(b'\n', newline)
+            if not self._ends_with_newline(path):
+                data = newline + data
+
+            def write(out: BinaryIO):
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                out.write(data)
+
+            self._rewrite(path, write)
+            return f'Texto acrescentado a {nome} ({path.stat().st_size} bytes agora).'
+        except FileNotFoundError:
+            return f'Erro: Arquivo {nome} não encontrado. Use criar_arquivo para criá-lo.'
+        except Exception as e:
+            return f'Erro ao acrescentar em {nome}: {e}'
+
+    @tool
+    def inserir_no_arquivo(self, nome: str, linha: int, conteudo: str) -> str:
+        """Insere texto antes de uma linha de um arquivo existente; as linhas seguintes descem.
+        
+        Use ler_linhas ou buscar_em_arquivo antes para achar o número da linha.
+        
+        Args:
+            nome: Nome do arquivo.
+            linha: Número da linha (começa em 1) antes da qual o texto entra; use o total de linhas + 1 para o fim.
+            conteudo: Texto a inserir (uma ou mais linhas).
+        """
+        try:
+            path = self._sandbox_path(nome)
+            if linha < 1:
+                return 'Erro: a linha começa em 1.'
+            newline = self._newline(path)
+            data = conteudo.replace('\r\n', '\n').encode('utf-8').replace(b'\n', newline)
+            if not data.endswith(newline):
+                data += newline
+            total = 0
+
+            def write(out: BinaryIO):
+                nonlocal total
+                with open(path, 'rb') as f:
+                    for total, raw in enumerate(f, 1):
+                        if total == linha:
+                            out.write(data)
+                        out.write(raw)
+                if linha == total + 1:
+                    if total and not raw.endswith(b'\n'):
+                        out.write(newline)
+                    out.write(data)
+                elif linha > total + 1:
+                    raise IndexError(f'{nome} tem só {total} linhas')
+
+            self._rewrite(path, write)
+            return f'{len(data.splitlines())} linha(s) inseridas em {nome} a partir da linha {linha}.'
+        except FileNotFoundError:
+            return f'Erro: Arquivo {nome} não encontrado.'
+        except IndexError as e:
+            return f'Erro: {e}; use linha={total + 1} para inserir no fim.'
+        except Exception as e:
+            return f'Erro ao inserir em {nome}: {e}'
+
+    @tool
+    def substituir_no_arquivo(self, nome: str, trecho: str, novo: str, todas: bool = False) -> str:
+        """Troca um trecho exato de um arquivo por outro texto, sem reescrever o resto.
+        
+        O trecho precisa aparecer exatamente uma vez, a não ser que 'todas' seja verdadeiro.
+        Inclua linhas vizinhas no trecho se ele se repetir. Use novo="" para apagar o trecho.
+        
+        Args:
+            nome: Nome do arquivo.
+            trecho: Texto atual, exatamente como está no arquivo (pode ter várias linhas).
+            novo: Texto que entra no lugar.
+            todas: Se verdadeiro, troca todas as ocorrências.
+        """
+        try:
+            path = self._sandbox_path(nome)
+            if not trecho:
+                return 'Erro: o trecho a substituir não pode ser vazio.'
+            if path.stat().st_size == 0:
+                return f"Erro: '{trecho[:80]}' não aparece em {nome}."
+
+            old = trecho.encode('utf-8')
+            new = novo.encode('utf-8')
+            positions = []
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # O modelo escreve \n; se o arquivo usa \r\n, procura e substitui nesse formato
+                if mm.find(old) < 0 and b'\r\n' in mm[:4096]:
+                    old = old.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
+                    new = new.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
+                position = mm.find(old)
+                while position >= 0 and (todas or len(positions) < 2):
+                    positions.append(position)
+                    position = mm.find(old, position + len(old))
+
+            if not positions:
+                return f"Erro: '{trecho[:80]}' não aparece em {nome}. Confira o texto exato com ler_linhas."
+            if len(positions) > 1 and not todas:
+                return (f"Erro: '{trecho[:80]}' aparece mais de uma vez em {nome}. "
+                        f'Inclua linhas vizinhas no trecho ou use todas=True.')
+
+            def write(out: BinaryIO):
+                # O mapeamento fecha antes da troca (no Windows não dá para substituir um arquivo mapeado)
+                with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    start = 0
+                    for position in positions:
+                        out.write(mm[start:position])
+                        out.write(new)
+                        start = position + len(old)
+                    out.write(mm[start:])
+
+            self._rewrite(path, write)
+            return f'{len(positions)} ocorrência(s) substituída(s) em {nome}.'
+        except FileNotFoundError:
+            return f'Erro: Arquivo {nome} não encontrado.'
+        except Exception as e:
+            return f'Erro ao substituir em {nome}: {e}'
+
     @tool
     def ler_arquivo(self, nome: str, foco: Optional[str] = None) -> str:
         """Lê um arquivo. Se for muito grande, resume automaticamente com IA auxiliar.
         
         O modelo deve usar 'foco' se estiver procurando algo específico num arquivo grande.
+        Para ver o texto exato de uma parte, prefira buscar_em_arquivo e ler_linhas.
         
         Args:
             nome: Nome do arquivo.
             foco: (Opcional) Se o arquivo for resumido, foca neste tópico.
         """
-        # Tenta ler primeiro
-        conteudo = self._read_file(nome)
+        # Limite de caracteres "seguro" antes de decidir resumir (aprox 3k tokens)
+        LIMITE_TAMANHO = 3000
+
+        # Lê só um caractere além do limite: basta para decidir, sem carregar um arquivo grande inteiro
+        conteudo = self._read_file(nome, LIMITE_TAMANHO + 1)
         
         # Se retornou erro, devolve o erro
         if conteudo.startswith("Erro"):
             return conteudo
-            
-        # Limite de caracteres "seguro" antes de decidir resumir (aprox 3k tokens)
-        LIMITE_TAMANHO = 3000
         
         if len(conteudo) > LIMITE_TAMANHO:
-            return (f"Arquivo '{nome}' é muito grande ({len(conteudo)} caracteres). "
+            tamanho = self._sandbox_path(nome).stat().st_size
+            return (f"Arquivo '{nome}' é muito grande ({tamanho} bytes). "
                     f"Gerando resumo automático...\n\n" + 
-                    self._summarize_file(nome, foco))
+                    self._summarize_file(nome, foco) +
+                    f"\n\nPara o texto exato, use buscar_em_arquivo ou ler_linhas em '{nome}'.")
         
         return conteudo
 
     @tool
-    def listar_arquivos(self) -> str:
-        """Lista todos os nomes de arquivos presentes no diretório sandbox.
+    def ler_linhas(self, nome: str, inicio: int = 1, fim: Optional[int] = None) -> str:
+        """Lê um intervalo de linhas de um arquivo, numeradas, sem carregar o arquivo inteiro.
+        
+        Use junto com buscar_em_arquivo para ver o trecho exato de um arquivo grande.
+        
+        Args:
+            nome: Nome do arquivo.
+            inicio: Primeira linha (começa em 1).
+            fim: (Opcional) Última linha, inclusive. Se omitido, lê até o limite de tamanho.
+        """
+        try:
+            path = self._sandbox_path(nome)
+            inicio = max(1, inicio)
+            linhas = []
+            total = 0
+            proxima = None
+            for number, line in self._iter_lines(path, inicio):
+                if fim is not None and number > fim:
+                    break
+                texto = f'{number}: {line}'
+                if linhas and total + len(texto) > MAX_SLICE_CHARS:
+                    proxima = number
+                    break
+                linhas.append(texto[:MAX_SLICE_CHARS])
+                total += len(texto) + 1
+
+            if not linhas:
+                return f'Arquivo {nome} não tem a linha {inicio}.'
+            resultado = '\n'.join(linhas)
+            if proxima:
+                resultado += f'\n[... limite de tamanho atingido; continue com inicio={proxima}]'
+            return resultado
+        except FileNotFoundError:
+            return f'Erro: Arquivo {nome} não encontrado.'
+        except Exception as e:
+            return f'Erro ao ler linhas de {nome}: {e}'
+
+    @tool
+    def ler_bytes(self, nome: str, inicio: int = 0, tamanho: int = 4000) -> str:
+        """Lê um trecho de um arquivo por posição em bytes (útil para arquivos sem quebras de linha).
+        
+        Args:
+            nome: Nome do arquivo.
+            inicio: Posição inicial em bytes (começa em 0).
+            tamanho: Quantidade de bytes a ler (no máximo 8000).
+        """
+        try:
+            path = self._sandbox_path(nome)
+            size = path.stat().st_size
+            inicio = max(0, inicio)
+            if inicio >= size:
+                return f'Arquivo {nome} tem só {size} bytes.'
+            texto, inicio, fim = self._read_bytes(path, inicio, max(1, min(tamanho, MAX_SLICE_CHARS)))
+            cabecalho = f'Bytes {inicio}-{fim} de {size} de {nome}:'
+            rodape = f'\n[... continue com inicio={fim}]' if fim < size else ''
+            return f'{cabecalho}\n{texto}{rodape}'
+        except FileNotFoundError:
+            return f'Erro: Arquivo {nome} não encontrado.'
+        except Exception as e:
+            return f'Erro ao ler bytes de {nome}: {e}'
+
+    @tool(cpu_bound=True)
+    def buscar_em_arquivo(self, padrao: str, nome: str = '*', contexto: int = 2, max_resultados: int = 20) -> str:
+        """Procura um texto ou expressão regular nas linhas dos arquivos, como o grep.
+        
+        Devolve as linhas encontradas (arquivo:linha: texto) com algumas linhas de contexto
+        (arquivo-linha- texto). Ignora maiúsculas/minúsculas.
+        
+        Args:
+            padrao: Texto ou expressão regular a procurar.
+            nome: Nome do arquivo, ou padrão como *.txt (padrão: todos os arquivos).
+            contexto: Linhas de contexto antes e depois de cada ocorrência.
+            max_resultados: Máximo de ocorrências devolvidas.
+        """
+        try:
+            try:
+                regex = re.compile(padrao, re.IGNORECASE)
+            except re.error:
+                regex = re.compile(re.escape(padrao), re.IGNORECASE)
+
+            root = FILE_SANDBOX.resolve()
+            arquivos = sorted(p for p in root.glob(nome) if p.is_file() and root in p.resolve().parents)
+            if not arquivos:
+                return f'Erro: Nenhum arquivo corresponde a {nome}.'
+
+            saida = []
+            total = 0
+            encontrados = 0
+            cortado = False
+            for path in arquivos:
+                relativo = path.relative_to(root).as_posix()
+                inicio_arquivo = len(saida)
+                for item in self._grep(path, regex, max(0, contexto)):
+                    if item is None:
+                        linha = '--'
+                    else:
+                        number, line, match = item
+                        if match and encontrados >= max_resultados:
+                            cortado = True
+                            break
+                        encontrados += match
+                        linha = f'{relativo}{":" if match else "-"}{number}{":" if match else "-"} {line[:MAX_LINE_CHARS]}'
+                    if total + len(linha) > MAX_SLICE_CHARS:
+                        cortado = True
+                        break
+                    if len(saida) == inicio_arquivo and saida:
+                        saida.append('--')
+                    saida.append(linha)
+                    total += len(linha) + 1
+                if cortado:
+                    break
+
+            if not encontrados:
+                return f"Nenhuma ocorrência de '{padrao}' em {nome}."
+            resultado = '\n'.join(saida)
+            if cortado:
+                resultado += '\n[... há mais ocorrências; refine o padrão ou use ler_linhas para ver um trecho]'
+            return resultado
+        except Exception as e:
+            return f'Erro ao buscar em {nome}: {e}'
+
+    @tool(cpu_bound=True)
+    def pesquisar_arquivos(self, busca: str, max_arquivos: int = 5) -> str:
+        """Procura quais arquivos do sandbox falam de um assunto, sem abrir um por um.
+        
+        Devolve os arquivos mais relevantes (BM25) com trechos que contêm as palavras
+        buscadas e a linha onde cada trecho começa, para continuar com ler_linhas.
+        
+        Args:
+            busca: Palavras a procurar (acentos e maiúsculas são ignorados).
+            max_arquivos: Quantos arquivos devolver no máximo.
+        """
+        try:
+            self.index.refresh()
+            resultados = self.index.search(busca)
+            if not resultados:
+                return f"Nenhum arquivo menciona '{busca}'."
+
+            # Agrupa por arquivo, na ordem do melhor bloco de cada um
+            por_arquivo: dict[str, list[tuple[int, str]]] = {}
+            for arquivo, linha, trecho, _ in resultados:
+                trechos = por_arquivo.setdefault(arquivo, [])
+                if len(trechos) < 2:
+                    trechos.append((linha, trecho))
+
+            saida = []
+            for arquivo, trechos in list(por_arquivo.items())[:max(1, max_arquivos)]:
+                saida.append(arquivo)
+                for linha, trecho in trechos:
+                    saida.append(f'  linha {linha}: {trecho}' if linha else '  (nome do arquivo)')
+            return '\n'.join(saida)
+        except Exception as e:
+            return f'Erro ao pesquisar arquivos: {e}'
+
+    @tool
+    def listar_arquivos(
+        self, padrao: str = '*', ordenar: Literal['nome', 'tamanho', 'data'] = 'nome', offset: int = 0, limite: int = 50
+    ) -> str:
+        """Lista os arquivos do sandbox (incluindo subpastas) com tamanho e data de modificação.
+        
+        Use para ver o que já foi criado antes de criar novos arquivos. Com muitos arquivos,
+        a lista vem em páginas: o cabeçalho diz o total e o rodapé o offset da próxima página.
         
-        Use para ver o que já foi criado antes de criar novos arquivos.
+        Args:
+            padrao: Filtro estilo glob, ex: *.txt, nota_*, relatorios/*.md (padrão: todos).
+            ordenar: 'nome' (A-Z), 'tamanho' (maiores primeiro) ou 'data' (mais recentes primeiro).
+            offset: Quantos arquivos pular (para ver as próximas páginas).
+            limite: Quantos arquivos devolver por página.
         """
-        return self._list_files()
+        return self._list_files(padrao, ordenar, offset, limite)
 
     @tool
     def deletar_arquivo(self, nome: str) -> str:
@@ -0,0 +1,270 @@
+"""
+Extrator de texto de HTML em uma única passada, com detecção do conteúdo principal
+
+Usa o `html.parser` da biblioteca padrão: subárvores inúteis (script, style, nav, ...)
+são puladas enquanto o documento é lido, entidades são decodificadas de verdade e cada
+bloco recebe uma pontuação por densidade de texto (estilo Readability), para que só o
+corpo do artigo chegue ao chunker. Aceita `feed()` incremental, então dá para alimentar
+o parser direto do download em streaming.
+"""
+
+from html.parser import HTMLParser
+import re
+
+# Versão da saída do extrator; mudou, o texto guardado no cache HTTP é refeito a partir do corpo
+EXTRACTOR_VERSION = 3
+
+# Subárvores descartadas inteiras. <form> não entra: páginas ASP.NET põem o corpo todo dentro
+# de um <form id="aspnetForm">; só os controles dele (botões, listas, caixas de texto) são pulados
+SKIP_TAGS = frozenset({
+    'script', 'style', 'head', 'svg', 'iframe', 'video', 'audio', 'canvas', 'nav', 'footer',
+    'aside', 'noscript', 'template', 'button', 'select', 'textarea', 'dialog',
+})
+# <header> é o cabeçalho do site, exceto dentro do conteúdo, onde costuma ter o título e o subtítulo
+CONTENT_TAGS = frozenset({'article', 'main'})
+# Elementos que quebram parágrafo; o resto (span, a, b, ...) é texto corrido
+BLOCK_TAGS = frozenset({
+    'html', 'body', 'main', 'article', 'section', 'div', 'p', 'blockquote', 'pre', 'ul', 'ol', 'li',
+    'dl', 'dt', 'dd', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th', 'caption', 'figure',
+    'figcaption', 'details', 'summary', 'address', 'center', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+})
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+# Tags que o HTML fecha implicitamente ao abrir outra igual (<p>a<p>b, <li>a<li>b)
+SELF_CLOSING_SIBLINGS = frozenset({'p', 'li', 'dt', 'dd', 'tr', 'td', 'th', 'option'})
+
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|page|post|story|text|materia|noticia|conteudo', re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r'comment|sidebar|footer|menu|share|social|cookie|banner|promo|related|sponsor|widget|popup|modal|'
+    r'advert|breadcrumb|newsletter|subscribe|comentario|publicidade|relacionad',
+    re.IGNORECASE
+)
+HINT_WEIGHT = 25
+# Parágrafos menores que isso não contam para a pontuação (mas aparecem na saída se estiverem no artigo)
+MIN_SCORED_CHARS = 25
+# Se o artigo escolhido tiver menos texto que isso, a página não tem um "corpo" claro: devolve tudo
+MIN_ARTICLE_CHARS = 250
+# Irmãos do melhor bloco entram junto se tiverem pelo menos essa fração da pontuação dele
+SIBLING_FRACTION = 0.2
+MAX_LINK_DENSITY = 0.5
+
+# Marcadores na pilha de elementos abertos (nós de bloco usam o próprio id, >= 0)
+INLINE, SKIPPED, LINK = -1, -2, -3
+
+
+class MainTextExtractor(HTMLParser):
+    """Parser que separa o HTML em parágrafos e escolhe o bloco principal por densidade de texto.
+
+    Uso: `feed()` quantas vezes quiser, depois `close()` e `text()`.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Árvore de blocos em listas paralelas (índice = id do nó); 0 é a raiz
+        self._parent = [-1]
+        self._weight = [0.0]
+        self._score = [0.0]
+        self._chars = [0]
+        self._link_chars = [0]
+
+        # Pilha de (tag, nó ou marcador) dos elementos abertos, e quantos de cada tag estão nela
+        # (uma tag de fechamento sem abertura correspondente é descartada sem varrer a pilha)
+        self._stack: list[tuple[str, int]] = []
+        self._open: dict[str, int] = {}
+        self._node = 0
+        self._skip_depth = 0
+        self._link_depth = 0
+        # Quantos <article>/<main> estão abertos (um <header> dentro deles não é pulado)
+        self._content_depth = 0
+
+        self._buffer: list[str] = []
+        self._buffer_link_chars = 0
+        # Parágrafos em ordem de documento: (nó, texto, caracteres dentro de links)
+        self.paragraphs: list[tuple[int, str, int]] = []
+
+    def _open_node(self, attrs: list[tuple[str, str | None]]) -> int:
+        node = len(self._parent)
+        self._parent.append(self._node)
+        hints = ' '.join(value or '' for name, value in attrs if name in ('class', 'id', 'role'))
+        weight = 0.0
+        if hints:
+            if POSITIVE_HINTS.search(hints):
+                weight += HINT_WEIGHT
+            if NEGATIVE_HINTS.search(hints):
+                weight -= HINT_WEIGHT
+        self._weight.append(weight)
+        self._score.append(0.0)
+        self._chars.append(0)
+        self._link_chars.append(0)
+        return node
+
+    def _flush(self):
+        """Fecha o parágrafo corrente (texto acumulado desde a última fronteira de bloco)"""
+        if not self._buffer:
+            return
+        text = ' '.join(''.join(self._buffer).split())
+        link_chars = min(self._buffer_link_chars, len(text))
+        self._buffer.clear()
+        self._buffer_link_chars = 0
+        if not text:
+            return
+
+        # Só o nó corrente conta agora; os ancestrais recebem o total quando ele fecha (_close_node)
+        self.paragraphs.append((self._node, text, link_chars))
+        self._chars[self._node] += len(text)
+        self._link_chars[self._node] += link_chars
+
+        if len(text) >= MIN_SCORED_CHARS:
+            # Como no Readability: o pai do parágrafo leva a pontuação inteira e o avô, metade
+            score = 1 + text.count(',') + min(len(text) // 100, 3)
+            parent = self._parent[self._node]
+            if parent >= 0:
+                self._score[parent] += score
+                grandparent = self._parent[parent]
+                if grandparent >= 0:
+                    self._score[grandparent] += score / 2
+
+    def _close_node(self, node: int):
+        """Passa os caracteres do bloco que fechou para o pai (cada nó soma uma vez só)"""
+        self._flush()
+        parent = self._parent[node]
+        if parent >= 0:
+            self._chars[parent] += self._chars[node]
+            self._link_chars[parent] += self._link_chars[node]
+        self._node = parent
+
+    def _push(self, tag: str, node: int):
+        self._stack.append((tag, node))
+        self._open[tag] = self._open.get(tag, 0) + 1
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+
+    def _pop(self):
+        tag, node = self._stack.pop()
+        self._open[tag] -= 1
+        if tag in CONTENT_TAGS:
+            self._content_depth -= 1
+        if node == SKIPPED:
+            self._skip_depth -= 1
+        elif node == LINK:
+            self._link_depth -= 1
+        elif node >= 0:
+            self._close_node(node)
+
+    def _pop_until(self, tag: str) -> bool:
+        """Fecha os elementos abertos até `tag` (inclusive); tolera HTML mal aninhado"""
+        if not self._open.get(tag):
+            return False
+        # A tag está na pilha: cada passo fecha um elemento, então o custo total é linear no documento
+        while True:
+            top = self._stack[-1][0]
+            self._pop()
+            if top == tag:
+                return True
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        if tag in VOID_TAGS:
+            if tag in ('br', 'hr') and not self._skip_depth:
+                self._flush()
+            return
+
+        if tag in SELF_CLOSING_SIBLINGS and self._stack and self._stack[-1][0] == tag:
+            self._pop_until(tag)
+
+        if (
+            tag in SKIP_TAGS
+            or (tag == 'header' and not self._content_depth)
+            or any(name == 'hidden' or (name == 'aria-hidden' and value == 'true') for name, value in attrs)
+        ):
+            self._skip_depth += 1
+            self._push(tag, SKIPPED)
+        elif self._skip_depth:
+            self._push(tag, INLINE)
+        elif tag == 'a':
+            self._link_depth += 1
+            self._push(tag, LINK)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            self._node = self._open_node(attrs)
+            self._push(tag, self._node)
+        else:
+            self._push(tag, INLINE)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        # <div/> etc.: abre e fecha na hora
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str):
+        if tag in VOID_TAGS:
+            return
+        self._pop_until(tag)
+
+    def handle_data(self, data: str):
+        if self._skip_depth:
+            return
+        self._buffer.append(data)
+        if self._link_depth:
+            self._buffer_link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        # Elementos que nunca foram fechados: fecha do mais interno para fora, somando nos pais
+        while self._stack:
+            self._pop()
+        self._flush()
+
+    def _final_score(self, node: int) -> float:
+        chars = self._chars[node]
+        link_density = self._link_chars[node] / chars if chars else 1.0
+        return self._score[node] * (1 - link_density) + self._weight[node]
+
+    def text(self) -> str:
+        """Parágrafos do conteúdo principal separados por linha em branco"""
+        if not self.paragraphs:
+            return ''
+
+        candidates = [node for node in range(len(self._parent)) if self._score[node] > 0]
+        selected: set[int] = set()
+        if candidates:
+            best = max(candidates, key=self._final_score)
+            best_score = self._final_score(best)
+            selected.add(best)
+            threshold = max(HINT_WEIGHT / 2, best_score * SIBLING_FRACTION)
+            for node in candidates:
+                if node != best and self._parent[node] == self._parent[best] and self._final_score(node) >= threshold:
+                    selected.add(node)
+
+        inside: dict[int, bool] = {}
+
+        def is_inside(node: int) -> bool:
+            chain = []
+            while node >= 0 and node not in inside:
+                if node in selected:
+                    inside[node] = True
+                    break
+                chain.append(node)
+                node = self._parent[node]
+            result = node >= 0 and inside[node]
+            for visited in chain:
+                inside[visited] = result
+            return result
+
+        def readable(text: str, link_chars: int) -> bool:
+            return link_chars / len(text) <= MAX_LINK_DENSITY
+
+        article = [text for node, text, link_chars in self.paragraphs if is_inside(node) and readable(text, link_chars)]
+        if sum(len(text) for text in article) < MIN_ARTICLE_CHARS:
+            # Sem um bloco principal claro (página curta, listagem...): fica com todo texto que não é menu
+            article = [text for _, text, link_chars in self.paragraphs if readable(text, link_chars)]
+        return '\n\n'.join(article)
+
+
+def extract_text(html: str) -> str:
+    """Extrai o texto do conteúdo principal de um documento HTML completo"""
+    parser = MainTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
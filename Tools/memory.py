@@ -5,16 +5,53 @@ Escrita originalmente por Arthur (Desenvolvedor original)
 """
 
 from .tool_registry import tool
-from datetime import datetime
-from typing import Optional, Literal
+from .model_residency import residency
+from .vector_index import VectorIndex
+from datetime import datetime, timedelta
+from typing import Optional, Literal, Callable, Iterator
+from difflib import SequenceMatcher
+from itertools import islice
+from config import config
 from pathlib import Path
+import numpy as np
+import threading
 import sqlite3
+import json
+import csv
+import re
 
 DATABASE_PATH = Path(__file__).parent.parent / 'memory' / 'memories.db'
 
+# Similaridade mínima para apagar uma memória por título aproximado
+FUZZY_DELETE_THRESHOLD = 0.85
+
+# Quantidade de memórias por página na linha do tempo
+TIMELINE_PAGE_SIZE = 10
+
+# Quantidade de resultados por página na busca e tamanho do trecho (em tokens)
+SEARCH_PAGE_SIZE = 10
+SNIPPET_TOKENS = 16
+
+# Linhas por executemany na importação em massa
+IMPORT_BATCH_SIZE = 10000
+
+# Triggers de inserção desligados durante a importação (o FTS é preenchido no final)
+INSERT_TRIGGERS = ('memories_ai', 'memories_titulos_ai')
+
+# Busca por sentido (quando nenhuma memória tem as palavras buscadas): memórias ainda sem
+# embedding são indexadas até EMBED_BATCH_SIZE por busca, e só entram resultados com
+# similaridade coseno a partir de SEMANTIC_MIN_SCORE
+EMBED_BATCH_SIZE = 256
+SEMANTIC_MIN_SCORE = 0.35
+SEMANTIC_SNIPPET_CHARS = 120
+
 class MemorySystem:
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, embedding_model: Optional[str] = None):
         self.db_path = db_path or DATABASE_PATH
+        self.embedding_model = embedding_model or config.get('models.embedding')
+        # Índice vetorial ao lado do banco, um por modelo de embedding (aberto no primeiro uso)
+        self._vectors: Optional[VectorIndex] = None
+        self._vectors_lock = threading.Lock()
         self._init_database()
 
     def _init_database(self):
@@ -29,15 +66,38 @@ class MemorySystem:
                 CREATE TABLE IF NOT EXISTS memories (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     titulo TEXT NOT NULL,
+                    titulo_norm TEXT NOT NULL DEFAULT '',
                     descricao TEXT NOT NULL,
-                    timestamp TEXT NOT NULL
+                    criado_em INTEGER NOT NULL
                 )
             ''')
+
+            # Migração: bancos antigos não tinham o título normalizado
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(memories)')]
+            if 'titulo_norm' not in columns:
+                cursor.execute("ALTER TABLE memories ADD COLUMN titulo_norm TEXT NOT NULL DEFAULT ''")
+                rows = cursor.execute('SELECT id, titulo FROM memories').fetchall()
+                cursor.executemany(
+                    'UPDATE memories SET titulo_norm = ? WHERE id = ?',
+                    [(self._normalize_titulo(titulo), mem_id) for mem_id, titulo in rows]
+                )
+                columns.append('titulo_norm')
+
+            # Migração: datas em texto ('%Y-%m-%d %H:%M:%S', hora local) viram epoch inteiro
+            if 'timestamp' in columns:
+                self._migrate_timestamps(cursor)
             
-            # Índice para busca case-insensitive por título
+            # Índice no título normalizado (substitui o antigo LOWER(titulo), que nunca era usado)
+            cursor.execute('DROP INDEX IF EXISTS idx_titulo_lower')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_titulo_norm 
+                ON memories(titulo_norm)
+            ''')
+
+            # Índice de cobertura para a linha do tempo (ordenação e intervalo sem ler a tabela)
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_titulo_lower 
-                ON memories(LOWER(titulo))
+                CREATE INDEX IF NOT EXISTS idx_criado_em
+                ON memories(criado_em, id, titulo)
             ''')
             
             # Tabela FTS5 para busca de texto completo
@@ -73,25 +133,132 @@ class MemorySystem:
                 END
             ''')
             
+            self._init_title_index(cursor)
+
+            # Memórias que já estão no índice vetorial de cada modelo; editar ou apagar tira daqui
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS memories_embedded (
+                    id INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    PRIMARY KEY (id, model)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS memories_embedded_ad AFTER DELETE ON memories BEGIN
+                    DELETE FROM memories_embedded WHERE id = old.id;
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS memories_embedded_au AFTER UPDATE OF titulo, descricao ON memories BEGIN
+                    DELETE FROM memories_embedded WHERE id = old.id;
+                END
+            ''')
+
             conn.commit()
 
+    def _migrate_timestamps(self, cursor: sqlite3.Cursor):
+        """Recria a tabela trocando a coluna `timestamp` (TEXT) por `criado_em` (epoch INTEGER).
+
+        Os IDs são preservados, então os índices FTS continuam válidos.
+        Os triggers somem junto com a tabela antiga e são recriados logo depois.
+        """
+        cursor.execute('''
+            CREATE TABLE memories_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                titulo TEXT NOT NULL,
+                titulo_norm TEXT NOT NULL DEFAULT '',
+                descricao TEXT NOT NULL,
+                criado_em INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO memories_new (id, titulo, titulo_norm, descricao, criado_em)
+            SELECT id, titulo, titulo_norm, descricao,
+                   COALESCE(CAST(strftime('%s', timestamp, 'utc') AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))
+            FROM memories
+        ''')
+        cursor.execute('DROP TABLE memories')
+        cursor.execute('ALTER TABLE memories_new RENAME TO memories')
+
+    def _init_title_index(self, cursor: sqlite3.Cursor):
+        """Cria o índice FTS5 trigram usado para achar títulos aproximados"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_titulos'"
+        ).fetchone()
+
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_titulos USING fts5(
+                    titulo_norm,
+                    content='memories',
+                    content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite antigo (< 3.34) não tem o tokenizer trigram: fica só a busca exata
+            self._fuzzy_titles = False
+            return
+
+        self._fuzzy_titles = True
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS memories_titulos_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_titulos(rowid, titulo_norm)
+                VALUES (new.id, new.titulo_norm);
+            END
+        ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS memories_titulos_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_titulos(memories_titulos, rowid, titulo_norm)
+                VALUES('delete', old.id, old.titulo_norm);
+            END
+        ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS memories_titulos_au AFTER UPDATE ON memories BEGIN
+                INSERT INTO memories_titulos(memories_titulos, rowid, titulo_norm)
+                VALUES('delete', old.id, old.titulo_norm);
+                INSERT INTO memories_titulos(rowid, titulo_norm)
+                VALUES (new.id, new.titulo_norm);
+            END
+        ''')
+
+        # Índice recém-criado num banco que já tinha memórias
+        if not exists:
+            cursor.execute("INSERT INTO memories_titulos(memories_titulos) VALUES('rebuild')")
+
     def _normalize_titulo(self, titulo: str) -> str:
         """Normaliza título: remove espaços extras e converte para minúsculo"""
         return ' '.join(titulo.lower().strip().split())
 
+    def _format_timestamp(self, criado_em: int) -> str:
+        """Formata um epoch no padrão brasileiro (hora local)"""
+        return datetime.fromtimestamp(criado_em).strftime('%d/%m/%Y às %H:%M')
+
+    def _parse_date(self, data: str) -> datetime:
+        """Converte 'DD/MM/AAAA' ou 'AAAA-MM-DD' para datetime (meia-noite, hora local)"""
+        for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y'):
+            try:
+                return datetime.strptime(data.strip(), fmt)
+            except ValueError:
+                continue
+        raise ValueError(f'data "{data}" inválida, use DD/MM/AAAA')
+
     def _save_memory(self, titulo: str, descricao: str) -> str:
         """Salva uma memória no banco de dados"""
         try:
             if not titulo.strip():
                 return 'Erro: Título não pode estar vazio'
             
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            criado_em = int(datetime.now().timestamp())
             
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    'INSERT INTO memories (titulo, descricao, timestamp) VALUES (?, ?, ?)',
-                    (titulo.strip(), descricao.strip(), timestamp)
+                    'INSERT INTO memories (titulo, titulo_norm, descricao, criado_em) VALUES (?, ?, ?, ?)',
+                    (titulo.strip(), self._normalize_titulo(titulo), descricao.strip(), criado_em)
                 )
                 memory_id = cursor.lastrowid
                 conn.commit()
@@ -100,55 +267,154 @@ class MemorySystem:
         except Exception as e:
             return f'Erro ao salvar: {str(e)}'
 
-    def _search_memories(self, termo_busca: str, limit: int = 10) -> str:
-        """Busca memórias por palavra-chave no título ou descrição"""
+    def _vector_index(self, dim: Optional[int] = None) -> Optional[VectorIndex]:
+        """Índice vetorial do modelo atual; sem `dim`, só abre um que já exista no disco"""
+        if self._vectors is None:
+            path = self.db_path.parent / 'memories_vectors' / re.sub(r'[^\w.-]', '_', self.embedding_model)
+            if dim is not None or (path / 'meta.json').exists():
+                self._vectors = VectorIndex(path, dim)
+        return self._vectors
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(residency.embedding(self.embedding_model).embed(texts), dtype=np.float32)
+
+    def _sync_vectors(self) -> Optional[VectorIndex]:
+        """Embeda e indexa as memórias novas ou editadas que ainda não estão no índice vetorial"""
+        with self._vectors_lock, sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT id, titulo, descricao FROM memories
+                WHERE id NOT IN (SELECT id FROM memories_embedded WHERE model = ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (self.embedding_model, EMBED_BATCH_SIZE)).fetchall()
+            if rows:
+                ids = [mem_id for mem_id, _, _ in rows]
+                vectors = self._embed([f'{titulo}\n{descricao}' for _, titulo, descricao in rows])
+                index = self._vector_index(vectors.shape[1])
+                # Memórias editadas já têm um vetor antigo no índice
+                index.remove(ids)
+                index.add(ids, vectors)
+                index.flush()
+                conn.executemany(
+                    'INSERT OR IGNORE INTO memories_embedded (id, model) VALUES (?, ?)',
+                    [(mem_id, self.embedding_model) for mem_id in ids]
+                )
+            return self._vector_index()
+
+    def _semantic_search(self, termo_busca: str, limit: int) -> list[tuple[int, str, str]]:
+        """(ID, título, trecho) das memórias com sentido mais parecido com a busca"""
+        index = self._sync_vectors()
+        if index is None:
+            return []
+        query = self._embed([termo_busca])[0]
+        with self._vectors_lock:
+            hits = [mem_id for mem_id, score in index.search(query, k=limit) if score >= SEMANTIC_MIN_SCORE]
+        if not hits:
+            return []
+
+        # Vetores de memórias apagadas fora desta instância podem sobrar no índice: só vale o que ainda existe
+        with sqlite3.connect(self.db_path) as conn:
+            found = {
+                mem_id: (titulo, descricao)
+                for mem_id, titulo, descricao in conn.execute(
+                    f"SELECT id, titulo, descricao FROM memories WHERE id IN ({', '.join('?' * len(hits))})", hits
+                )
+            }
+
+        results = []
+        for mem_id in hits:
+            if mem_id not in found:
+                continue
+            titulo, descricao = found[mem_id]
+            trecho = descricao[:SEMANTIC_SNIPPET_CHARS] + ('…' if len(descricao) > SEMANTIC_SNIPPET_CHARS else '')
+            results.append((mem_id, titulo, ' '.join(trecho.split())))
+        return results
+
+    def _search_memories(self, termo_busca: str, deslocamento: int = 0, limit: int = SEARCH_PAGE_SIZE) -> str:
+        """Busca memórias por palavra-chave, devolvendo só o ID, o título e um trecho do conteúdo"""
         try:
             if not termo_busca.strip():
                 return self._get_recent_memories()
 
+            deslocamento = max(deslocamento, 0)
+
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                # Busca FTS
+                # Busca FTS (um resultado a mais só para saber se existe próxima página)
                 cursor.execute('''
-                    SELECT m.id, m.titulo, m.descricao, m.timestamp
+                    SELECT m.id,
+                           highlight(memories_fts, 0, '[', ']'),
+                           snippet(memories_fts, 1, '[', ']', '…', ?)
                     FROM memories_fts fts
                     JOIN memories m ON fts.rowid = m.id
                     WHERE memories_fts MATCH ?
                     ORDER BY rank
-                    LIMIT ?
-                ''', (termo_busca, limit))
+                    LIMIT ? OFFSET ?
+                ''', (SNIPPET_TOKENS, termo_busca, limit + 1, deslocamento))
                 
                 results = cursor.fetchall()
                 
                 if not results:
-                    return f'Nenhuma memória encontrada para "{termo_busca}"'
+                    if deslocamento:
+                        return f'Sem mais memórias para "{termo_busca}".'
+                    return self._format_semantic_results(termo_busca, limit)
                 
-                output = f'Encontradas {len(results)} memória(s):\n\n'
-                for mem_id, titulo, desc, ts in results:
-                    try:
-                        dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
-                        formatted = dt.strftime('%d/%m/%Y às %H:%M')
-                    except ValueError:
-                        formatted = ts
-                    
-                    output += f'• **{titulo}** (ID: {mem_id})\n'
-                    output += f'  {desc}\n'
-                    output += f'  📅 {formatted}\n\n'
+                has_more = len(results) > limit
+                results = results[:limit]
+
+                output = f'Memórias {deslocamento + 1}-{deslocamento + len(results)} para "{termo_busca}":\n'
+                for mem_id, titulo, trecho in results:
+                    output += f'[ID {mem_id}] {titulo}: {trecho}\n'
                 
-                return output.strip()
+                output += '\nUse `ler_memoria` com o ID para ver uma memória completa.'
+                if has_more:
+                    output += f'\nPara ver mais, use deslocamento={deslocamento + limit}.'
+                return output
         except Exception as e:
             return f'Erro ao buscar: {str(e)}'
 
+    def _format_semantic_results(self, termo_busca: str, limit: int) -> str:
+        """Resposta da busca quando nenhuma memória tem as palavras: tenta pelo sentido (sem embeddings, desiste)"""
+        try:
+            results = self._semantic_search(termo_busca, limit)
+        except Exception:
+            results = []
+        if not results:
+            return f'Nenhuma memória encontrada para "{termo_busca}"'
+
+        output = f'Nenhuma memória com essas palavras. Memórias com sentido parecido com "{termo_busca}":\n'
+        for mem_id, titulo, trecho in results:
+            output += f'[ID {mem_id}] {titulo}: {trecho}\n'
+        output += '\nUse `ler_memoria` com o ID para ver uma memória completa.'
+        return output
+
+    def _get_memory(self, memory_id: int) -> str:
+        """Recupera uma memória completa pelo ID"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                result = conn.execute(
+                    'SELECT titulo, descricao, criado_em FROM memories WHERE id = ?',
+                    (memory_id,)
+                ).fetchone()
+
+            if not result:
+                return f'Memória com ID {memory_id} não encontrada'
+
+            titulo, desc, criado_em = result
+            return f'• **{titulo}** (ID: {memory_id})\n  {desc}\n  📅 {self._format_timestamp(criado_em)}'
+        except Exception as e:
+            return f'Erro ao ler memória: {str(e)}'
+
     def _get_recent_memories(self, limit: int = 5) -> str:
-        """Recupera as memórias mais recentes"""
+        """Recupera os títulos das memórias mais recentes (só lê o idx_criado_em)"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT id, titulo, descricao, timestamp
-                    FROM memories 
-                    ORDER BY timestamp DESC
+                    SELECT id, titulo, criado_em
+                    FROM memories INDEXED BY idx_criado_em
+                    ORDER BY criado_em DESC, id DESC
                     LIMIT ?
                 ''', (limit,))
                 
@@ -158,49 +424,251 @@ class MemorySystem:
                     return 'Nenhuma memória salva ainda.\nDica: Siga o assunto insentivando criar memórias novas!'
                 
                 output = f'Últimas {len(results)} memória(s):\n\n'
-                for mem_id, titulo, desc, ts in results:
-                    try:
-                        dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
-                        formatted = dt.strftime('%d/%m/%Y às %H:%M')
-                    except ValueError:
-                        formatted = ts
-                    
-                    output += f'• **{titulo}** (ID: {mem_id})\n'
-                    output += f'  {desc}\n'
-                    output += f'  📅 {formatted}\n\n'
+                for mem_id, titulo, criado_em in results:
+                    output += f'• **{titulo}** (ID: {mem_id}) 📅 {self._format_timestamp(criado_em)}\n'
                 
-                return output.strip()
+                output += '\nUse `ler_memoria` com o ID para ver o conteúdo.'
+                return output
         except Exception as e:
             return f'Erro ao recuperar memórias recentes: {str(e)}'
 
+    def _get_timeline(self, data_inicio: str, data_fim: Optional[str], deslocamento: int = 0) -> str:
+        """Lista memórias criadas entre duas datas (inclusivas), paginando pelo idx_criado_em"""
+        try:
+            inicio = self._parse_date(data_inicio)
+            fim = self._parse_date(data_fim) if data_fim else inicio
+            if fim < inicio:
+                inicio, fim = fim, inicio
+
+            start = int(inicio.timestamp())
+            end = int((fim + timedelta(days=1)).timestamp())
+            deslocamento = max(deslocamento, 0)
+
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                total = cursor.execute(
+                    'SELECT COUNT(*) FROM memories WHERE criado_em >= ? AND criado_em < ?',
+                    (start, end)
+                ).fetchone()[0]
+
+                cursor.execute('''
+                    SELECT id, titulo, criado_em
+                    FROM memories INDEXED BY idx_criado_em
+                    WHERE criado_em >= ? AND criado_em < ?
+                    ORDER BY criado_em, id
+                    LIMIT ? OFFSET ?
+                ''', (start, end, TIMELINE_PAGE_SIZE, deslocamento))
+
+                results = cursor.fetchall()
+
+            periodo = f'{inicio:%d/%m/%Y} a {fim:%d/%m/%Y}'
+            if not results:
+                if total:
+                    return f'Sem mais memórias de {periodo} (total: {total}).'
+                return f'Nenhuma memória salva entre {periodo}.'
+
+            output = f'Memórias de {periodo} ({deslocamento + 1}-{deslocamento + len(results)} de {total}):\n\n'
+            for mem_id, titulo, criado_em in results:
+                output += f'• **{titulo}** (ID: {mem_id}) 📅 {self._format_timestamp(criado_em)}\n'
+
+            output += '\nUse `ler_memoria` com o ID para ver o conteúdo.'
+            if deslocamento + len(results) < total:
+                output += f'\nPara ver mais, use deslocamento={deslocamento + len(results)}.'
+            return output
+        except Exception as e:
+            return f'Erro ao listar memórias do período: {str(e)}'
+
+    def _find_similar_titles(self, cursor: sqlite3.Cursor, normalized: str, limit: int = 5) -> list[tuple[int, str, float]]:
+        """Busca títulos parecidos pelo índice trigram, do mais para o menos similar"""
+        if not self._fuzzy_titles or len(normalized) < 3:
+            return []
+
+        # Qualquer trigrama em comum vira candidato; o rank (bm25) já traz os mais parecidos primeiro
+        trigrams = {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+        query = ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+
+        cursor.execute('''
+            SELECT m.id, m.titulo, m.titulo_norm
+            FROM memories_titulos t
+            JOIN memories m ON t.rowid = m.id
+            WHERE memories_titulos MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        ''', (query, limit * 4))
+
+        candidates = [
+            (mem_id, titulo, SequenceMatcher(None, normalized, titulo_norm).ratio())
+            for mem_id, titulo, titulo_norm in cursor.fetchall()
+        ]
+        candidates.sort(key=lambda candidate: candidate[2], reverse=True)
+        return candidates[:limit]
+
     def _delete_memory(self, titulo: str) -> str:
-        """Remove memória pelo título (case-insensitive)"""
+        """Remove memória pelo título (exato ou aproximado, case-insensitive)"""
         try:
             normalized = self._normalize_titulo(titulo)
             
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                # Busca a memória
+                # Busca exata pelo título normalizado (usa idx_titulo_norm)
                 cursor.execute(
-                    'SELECT id, titulo FROM memories WHERE LOWER(TRIM(titulo)) = ?',
+                    'SELECT id, titulo FROM memories WHERE titulo_norm = ?',
                     (normalized,)
                 )
                 result = cursor.fetchone()
                 
                 if not result:
-                    return f'Memória "{titulo}" não encontrada'
+                    candidates = self._find_similar_titles(cursor, normalized)
+                    if not candidates:
+                        return f'Memória "{titulo}" não encontrada'
+
+                    best_id, best_titulo, best_score = candidates[0]
+                    runner_up = candidates[1][2] if len(candidates) > 1 else 0.0
+
+                    # Só apaga sozinho se o melhor candidato for claramente o certo
+                    if best_score < FUZZY_DELETE_THRESHOLD or best_score - runner_up < 0.1:
+                        output = f'Memória "{titulo}" não encontrada. Títulos parecidos:\n'
+                        for mem_id, similar, _ in candidates:
+                            output += f'• {similar} (ID: {mem_id})\n'
+                        output += 'Chame de novo com o título exato da memória a ser apagada.'
+                        return output
+
+                    result = (best_id, best_titulo)
                 
                 mem_id, original_titulo = result
                 
                 # Deleta
                 cursor.execute('DELETE FROM memories WHERE id = ?', (mem_id,))
                 conn.commit()
+
+                with self._vectors_lock:
+                    if (index := self._vector_index()) is not None:
+                        index.remove([mem_id])
+                        index.flush()
                 
                 return f'✓ Memória deletada: "{original_titulo}" (ID: {mem_id})'
         except Exception as e:
             return f'Erro ao deletar: {str(e)}'
 
+    def _parse_criado_em(self, value) -> int:
+        """Aceita epoch, data ISO ('AAAA-MM-DD HH:MM:SS') ou DD/MM/AAAA; vazio vira agora"""
+        if value is None or str(value).strip() == '':
+            return int(datetime.now().timestamp())
+        try:
+            return int(float(value))
+        except ValueError:
+            pass
+        try:
+            return int(datetime.fromisoformat(str(value).strip()).timestamp())
+        except ValueError:
+            return int(self._parse_date(str(value)).timestamp())
+
+    def _read_import_file(self, path: Path) -> Iterator[dict]:
+        """Lê registros de um JSONL ou CSV sob demanda, sem carregar o arquivo inteiro"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if path.suffix.lower() == '.csv':
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def import_memories(self, path: Path, on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """Importa memórias de um arquivo JSONL ou CSV numa única transação.
+
+        Cada registro precisa de `titulo` e `descricao` (ou `conteudo`); `criado_em` é opcional.
+        Os triggers de inserção do FTS ficam desligados durante a carga e os índices
+        recebem só as linhas novas de uma vez no final.
+
+        Returns:
+            Quantidade de memórias importadas.
+        """
+        rows = (
+            (
+                str(record['titulo']).strip(),
+                self._normalize_titulo(str(record['titulo'])),
+                str(record.get('descricao', record.get('conteudo', ''))).strip(),
+                self._parse_criado_em(record.get('criado_em'))
+            )
+            for record in self._read_import_file(path)
+            if str(record.get('titulo', '')).strip()
+        )
+
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+
+            last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM memories').fetchone()[0]
+            placeholders = ', '.join('?' for _ in INSERT_TRIGGERS)
+            triggers = cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                INSERT_TRIGGERS
+            ).fetchall()
+            for name, _ in triggers:
+                cursor.execute(f'DROP TRIGGER {name}')
+
+            total = 0
+            while batch := list(islice(rows, IMPORT_BATCH_SIZE)):
+                cursor.executemany(
+                    'INSERT INTO memories (titulo, titulo_norm, descricao, criado_em) VALUES (?, ?, ?, ?)',
+                    batch
+                )
+                total += len(batch)
+                if on_progress:
+                    on_progress(total)
+
+            # Indexa as linhas novas de uma vez e devolve os triggers
+            cursor.execute('''
+                INSERT INTO memories_fts(rowid, titulo, descricao)
+                SELECT id, titulo, descricao FROM memories WHERE id > ?
+            ''', (last_id,))
+            if self._fuzzy_titles:
+                cursor.execute('''
+                    INSERT INTO memories_titulos(rowid, titulo_norm)
+                    SELECT id, titulo_norm FROM memories WHERE id > ?
+                ''', (last_id,))
+            for _, sql in triggers:
+                cursor.execute(sql)
+
+            cursor.execute('COMMIT')
+            return total
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def export_memories(self, path: Path, on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """Exporta todas as memórias para JSONL ou CSV (pela extensão), linha a linha.
+
+        Returns:
+            Quantidade de memórias exportadas.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fields = ('id', 'titulo', 'descricao', 'criado_em')
+
+        with sqlite3.connect(self.db_path) as conn, open(path, 'w', encoding='utf-8', newline='') as f:
+            cursor = conn.execute('SELECT id, titulo, descricao, criado_em FROM memories ORDER BY id')
+
+            writer = csv.writer(f) if path.suffix.lower() == '.csv' else None
+            if writer:
+                writer.writerow(fields)
+
+            total = 0
+            while batch := cursor.fetchmany(IMPORT_BATCH_SIZE):
+                if writer:
+                    writer.writerows(batch)
+                else:
+                    f.writelines(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n' for row in batch)
+                total += len(batch)
+                if on_progress:
+                    on_progress(total)
+
+        return total
+
     @tool
     def salvar_memoria(self, titulo: str, conteudo: str) -> str:
         """Salva uma nova informação importante na memória de longo prazo da Ami.
@@ -215,23 +683,48 @@ class MemorySystem:
         return self._save_memory(titulo, conteudo)
 
     @tool
-    def buscar_memoria(self, busca: str) -> str:
+    def buscar_memoria(self, busca: str, deslocamento: int = 0) -> str:
         """Pesquisa nas memórias salvas por palavras-chave.
         
         Use isso sempre que precisar recuperar informações específicas e mais antigas.
+        Retorna só um trecho de cada memória; use `ler_memoria` para o conteúdo completo.
         
         Args:
             busca: A palavra-chave ou frase para buscar no banco de dados.
+            deslocamento: Quantos resultados pular (paginação, 10 por página).
+        """
+        return self._search_memories(busca, deslocamento)
+
+    @tool
+    def ler_memoria(self, id: int) -> str:
+        """Mostra uma memória completa (título, conteúdo e data).
+        
+        Args:
+            id: O ID da memória, como aparece em `buscar_memoria` ou nas listagens.
         """
-        return self._search_memories(busca)
+        return self._get_memory(id)
     
     @tool
     def listar_memorias_recentes(self) -> str:
-        """Mostra as últimas 5 memórias adicionadas ao sistema.
+        """Mostra os títulos das últimas 5 memórias adicionadas ao sistema.
         
         Útil para memórias abrangentes e recentemente salvas.
         """
         return self._get_recent_memories()
+
+    @tool
+    def listar_memorias_por_periodo(self, data_inicio: str, data_fim: Optional[str] = None, deslocamento: int = 0) -> str:
+        """Lista as memórias salvas entre duas datas, das mais antigas para as mais novas.
+        
+        Use para perguntas como "o que eu te contei semana passada?".
+        Confira a data atual com `obter_horario` antes de calcular o período.
+        
+        Args:
+            data_inicio: Primeiro dia do período (DD/MM/AAAA).
+            data_fim: Último dia do período (DD/MM/AAAA). Se omitido, usa só `data_inicio`.
+            deslocamento: Quantas memórias pular (paginação, 10 por página).
+        """
+        return self._get_timeline(data_inicio, data_fim, deslocamento)
     
     @tool
     def esquecer_memoria(self, titulo: str) -> str:
@@ -241,5 +734,6 @@ class MemorySystem:
         
         Args:
             titulo: O título da memória a ser deletada (deve ser exato ou muito próximo).
+                Se houver mais de um título parecido, devolve a lista de candidatos.
         """
         return self._delete_memory(titulo)
\ No newline at end of file
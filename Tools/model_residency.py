@@ -0,0 +1,129 @@
+"""
+Gerenciador de residência de modelos do LM Studio compartilhado entre as ferramentas
+
+Em vez de cada ferramenta carregar, descarregar e recarregar modelos a cada chamada,
+todas pedem o modelo aqui: ele fica carregado enquanto couber no orçamento de memória
+e só os menos usados recentemente (LRU) são descarregados quando falta espaço.
+"""
+
+from collections import OrderedDict
+from typing import Any, Literal, Optional
+from config import config
+import lmstudio as lms
+import threading
+
+ModelKind = Literal['llm', 'embedding']
+
+GB = 1024 ** 3
+
+
+class ModelResidencyManager:
+    """Mantém um único `lms.Client` e controla quais modelos ficam carregados.
+
+    - `memory_budget_gb` (config `advanced.model_residency.memory_budget_gb`): soma máxima do
+      tamanho dos modelos carregados. 0 = sem limite próprio; só descarrega se o LM Studio
+      recusar o carregamento por falta de memória.
+    - Modelos fixados (`pin=True`, ex.: o modelo principal do chat) nunca são descarregados.
+    """
+
+    def __init__(self, host: Optional[str] = None, memory_budget_gb: Optional[float] = None, ttl: Optional[int] = None):
+        self.host = host or config.host
+        budget = memory_budget_gb if memory_budget_gb is not None else config.get('advanced.model_residency.memory_budget_gb', 0)
+        self.memory_budget = int(float(budget) * GB)
+        self.ttl = ttl if ttl is not None else config.get('advanced.model_residency.ttl', 3600)
+
+        self._client: Optional[lms.Client] = None
+        # model_key -> (tipo, identificador da instância, tamanho em bytes), do menos para o mais recente
+        self._resident: OrderedDict[str, tuple[ModelKind, str, int]] = OrderedDict()
+        self._pinned: set[str] = set()
+        self._sizes: dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def client(self) -> lms.Client:
+        """Conexão única com o servidor do LM Studio (criada no primeiro uso)"""
+        with self._lock:
+            if self._client is None:
+                self._client = lms.Client(self.host)
+            return self._client
+
+    def _namespace(self, kind: ModelKind) -> Any:
+        return self.client.llm if kind == 'llm' else self.client.embedding
+
+    def _sync(self):
+        """Atualiza a lista de residentes com o que o servidor realmente tem carregado"""
+        loaded: dict[str, tuple[ModelKind, str, int]] = {}
+        for kind in ('llm', 'embedding'):
+            for handle in self._namespace(kind).list_loaded():
+                info = handle.get_info()
+                loaded[info.model_key] = (kind, handle.identifier, info.size_bytes)
+
+        # Mantém a ordem LRU conhecida; modelos carregados por fora entram como os mais antigos
+        for key in list(self._resident):
+            if key not in loaded:
+                del self._resident[key]
+        for key, entry in loaded.items():
+            is_new = key not in self._resident
+            self._resident[key] = entry
+            if is_new:
+                self._resident.move_to_end(key, last=False)
+
+    def _model_size(self, model_key: str) -> int:
+        if model_key not in self._sizes:
+            for downloaded in self.client.list_downloaded_models():
+                self._sizes[downloaded.model_key] = downloaded.info.size_bytes
+        return self._sizes.get(model_key, 0)
+
+    def _evict_one(self, keep: str) -> bool:
+        """Descarrega o modelo menos usado recentemente (exceto fixados e o `keep`)"""
+        for key, (kind, identifier, _) in self._resident.items():
+            if key == keep or key in self._pinned:
+                continue
+            self._namespace(kind).unload(identifier)
+            del self._resident[key]
+            return True
+        return False
+
+    def _make_room(self, model_key: str):
+        if not self.memory_budget:
+            return
+        needed = self._model_size(model_key)
+        while sum(size for _, _, size in self._resident.values()) + needed > self.memory_budget:
+            if not self._evict_one(keep=model_key):
+                break
+
+    def acquire(self, kind: ModelKind, model_key: str, load_config: Any = None, pin: bool = False) -> Any:
+        """Retorna o handle do modelo, carregando (e abrindo espaço) só se ainda não estiver residente"""
+        with self._lock:
+            if pin:
+                self._pinned.add(model_key)
+
+            if model_key in self._resident:
+                self._resident.move_to_end(model_key)
+                return self._namespace(kind).model(model_key)
+
+            self._sync()
+            if model_key not in self._resident:
+                self._make_room(model_key)
+
+            while True:
+                try:
+                    handle = self._namespace(kind).model(model_key, ttl=self.ttl, config=load_config)
+                    break
+                except lms.LMStudioServerError:
+                    # Sem memória no servidor: libera o LRU e tenta de novo
+                    if not self._evict_one(keep=model_key):
+                        raise
+
+            self._resident[model_key] = (kind, handle.identifier, handle.get_info().size_bytes)
+            self._resident.move_to_end(model_key)
+            return handle
+
+    def llm(self, model_key: str, load_config: Optional[lms.LlmLoadModelConfigDict] = None, pin: bool = False) -> lms.LLM:
+        return self.acquire('llm', model_key, load_config, pin)
+
+    def embedding(self, model_key: str) -> lms.EmbeddingModel:
+        return self.acquire('embedding', model_key)
+
+
+residency = ModelResidencyManager()
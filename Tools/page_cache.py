@@ -0,0 +1,377 @@
+"""
+Download de páginas com conexões reaproveitadas e cache HTTP em disco
+
+Uma única `requests.Session` (com pool por host) atende todas as leituras. As respostas
+ficam comprimidas em cache/http/ junto com o texto já limpo, respeitando
+Cache-Control/Expires e revalidando com ETag/Last-Modified (requisições condicionais).
+O diretório tem um orçamento de tamanho e de idade: passando dele, as páginas usadas há
+mais tempo são apagadas.
+
+O download é em streaming: para no limite de bytes configurado, recusa cedo o que não é
+HTML/texto (PDF, imagem, binário) e vai decodificando e alimentando o extrator aos pedaços.
+Páginas grandes são limpas no pool de processos do `ToolRegistry`, fora do interpretador
+principal, para não travar o streaming da resposta.
+"""
+
+from .html_extractor import MainTextExtractor, EXTRACTOR_VERSION
+from .tool_registry import ToolRegistry
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Callable, Optional
+from pathlib import Path
+from config import config
+import requests
+import hashlib
+import codecs
+import json
+import os
+import threading
+import time
+import zlib
+import re
+
+HTTP_CACHE_DIR = Path(__file__).parent.parent / 'cache' / 'http'
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,text/plain;q=0.8',
+}
+POOL_SIZE = 16
+DOWNLOAD_CHUNK = 64 * 1024
+# Tipos aceitos; sem Content-Type (ou genérico) decide pelos primeiros bytes
+TEXT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+GENERIC_TYPES = ('', 'application/octet-stream', 'binary/octet-stream')
+# Tipos em que o cabeçalho não basta: os primeiros bytes ainda são conferidos (text/plain é o padrão de muito servidor)
+SNIFF_TYPES = GENERIC_TYPES + ('text/plain',)
+BINARY_SIGNATURES = (
+    b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04', b'RIFF', b'\x1f\x8b', b'OggS',
+)
+# A partir deste tamanho (caracteres) o HTML é limpo num worker; abaixo, a ida e volta custa mais que a limpeza
+OFFLOAD_MIN_CHARS = 64 * 1024
+# Sem max-age/Expires, considera a página fresca por 10% da idade (Last-Modified), até 1 dia
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX = 24 * 60 * 60
+# Ao estourar o tamanho máximo, apaga até ficar nessa fração dele (evita varrer o diretório a cada página)
+EVICTION_TARGET = 0.8
+# Mesmo sem estourar o tamanho, procura páginas velhas demais no máximo uma vez por este intervalo
+AGE_CHECK_INTERVAL = 60 * 60
+
+
+class UnsupportedContentError(requests.RequestException):
+    """O link não aponta para uma página de texto (PDF, imagem, arquivo binário...)"""
+
+
+def _extract(extractor: Callable[[], MainTextExtractor], html: str) -> str:
+    """Limpa o HTML inteiro de uma vez (função de módulo para poder rodar num worker)"""
+    parser = extractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+class PageFetcher:
+    """Baixa páginas com keep-alive e devolve o texto limpo, usando o cache sempre que possível.
+
+    `extractor` cria o parser incremental (`feed`/`close`/`text`) que recebe o HTML durante o
+    download; `version` identifica a saída dele para invalidar o texto guardado quando muda.
+    Páginas acima de `OFFLOAD_MIN_CHARS` são limpas num worker, então `extractor` precisa ser
+    uma classe ou função de módulo (serializável com pickle).
+
+    Config `advanced.http_cache`: `max_mb` (tamanho máximo do diretório) e `max_age_days`
+    (páginas sem uso há mais tempo que isso são apagadas), verificados ao gravar.
+    """
+
+    def __init__(
+        self,
+        directory: Path = HTTP_CACHE_DIR,
+        timeout: float = 10,
+        max_bytes: Optional[int] = None,
+        extractor: Callable[[], MainTextExtractor] = MainTextExtractor,
+        version: int = EXTRACTOR_VERSION,
+        max_cache_mb: Optional[float] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.max_bytes = max_bytes if max_bytes is not None else int(config.get('advanced.page_download.max_mb', 2) * 1024 ** 2)
+        self.extractor = extractor
+        self.version = version
+
+        cache_mb = max_cache_mb if max_cache_mb is not None else config.get('advanced.http_cache.max_mb', 256)
+        age_days = max_age_days if max_age_days is not None else config.get('advanced.http_cache.max_age_days', 30)
+        self.max_cache_bytes = int(cache_mb * 1024 ** 2)
+        self.max_age = age_days * 86400
+        # Tamanho do diretório (estimado: soma o que é gravado, recalculado a cada limpeza) e hora da última limpeza
+        self._cache_size: Optional[int] = None
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _paths(self, url: str) -> tuple[Path, Path, Path]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return (
+            self.directory / f'{key}.json',
+            self.directory / f'{key}.body.z',
+            self.directory / f'{key}.text.z',
+        )
+
+    def _freshness(self, headers: requests.structures.CaseInsensitiveDict) -> tuple[Optional[float], bool]:
+        """Retorna (expira_em, pode_guardar) a partir dos cabeçalhos de cache"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return None, False
+        if 'no-cache' in cache_control:
+            return 0, True
+
+        now = time.time()
+        if match := re.search(r'max-age=(\d+)', cache_control):
+            return now + int(match.group(1)), True
+
+        try:
+            if expires := headers.get('Expires'):
+                return parsedate_to_datetime(expires).timestamp(), True
+            if last_modified := headers.get('Last-Modified'):
+                age = now - parsedate_to_datetime(last_modified).timestamp()
+                return now + min(max(age, 0) * HEURISTIC_FRACTION, HEURISTIC_MAX), True
+        except (TypeError, ValueError):
+            pass
+        return 0, True
+
+    def _load(self, url: str) -> Optional[dict]:
+        meta_path, body_path, text_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if not text_path.exists() or not body_path.exists():
+                return None
+            return meta
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _read_text(self, url: str) -> str:
+        return zlib.decompress(self._paths(url)[2].read_bytes()).decode('utf-8')
+
+    def _cached_text(self, url: str, meta: dict) -> str:
+        """Texto guardado; se foi gerado por outra versão do extrator, limpa de novo o corpo salvo"""
+        if meta.get('text_version', 0) == self.version:
+            return self._read_text(url)
+        body = zlib.decompress(self._paths(url)[1].read_bytes()).decode('utf-8')
+        if len(body) >= OFFLOAD_MIN_CHARS:
+            text = ToolRegistry.run_in_worker(_extract, self.extractor, body)
+        else:
+            text = _extract(self.extractor, body)
+        meta['text_version'] = self.version
+        self._store(url, meta, text=text)
+        return text
+
+    @staticmethod
+    def _check_content_type(content_type: str) -> str:
+        """Falha cedo, só pelo cabeçalho (antes de ler qualquer byte do corpo), para o que não é texto. Retorna o mime"""
+        mime = content_type.split(';', 1)[0].strip().lower()
+        if mime not in TEXT_TYPES and mime not in GENERIC_TYPES:
+            raise UnsupportedContentError(f'conteúdo não suportado ({mime}), só páginas HTML ou texto')
+        return mime
+
+    @staticmethod
+    def _check_signature(mime: str, head: bytes):
+        """Recusa arquivos binários servidos com tipo genérico, pelos primeiros bytes"""
+        if head.startswith(BINARY_SIGNATURES) or b'\x00' in head[:1024]:
+            raise UnsupportedContentError(f'o link aponta para um arquivo binário ({mime or "tipo desconhecido"})')
+
+    @staticmethod
+    def _sniff_encoding(content_type: str, head: bytes) -> str:
+        """Charset do cabeçalho, BOM ou <meta charset> do começo do documento; senão UTF-8"""
+        candidates = []
+        if match := re.search(r'charset=["\']?([\w.:-]+)', content_type, re.IGNORECASE):
+            candidates.append(match.group(1))
+        if head.startswith(codecs.BOM_UTF8):
+            candidates.insert(0, 'utf-8-sig')
+        if match := re.search(rb'<meta[^>]+charset=["\']?([\w.:-]+)', head[:4096], re.IGNORECASE):
+            candidates.append(match.group(1).decode('ascii'))
+
+        for name in candidates:
+            try:
+                return codecs.lookup(name).name
+            except LookupError:
+                continue
+        return 'utf-8'
+
+    def _download(self, response: requests.Response) -> tuple[str, str, bool]:
+        """Lê a resposta em pedaços até o limite, alimentando o extrator. Retorna (corpo, texto, truncado)
+
+        Se a página passa de `OFFLOAD_MIN_CHARS`, o extrator incremental é abandonado e o corpo
+        inteiro é limpo num worker no fim do download.
+        """
+        content_type = response.headers.get('Content-Type', '')
+        mime = self._check_content_type(content_type)
+        chunks = response.iter_content(DOWNLOAD_CHUNK)
+        head = next(chunks, b'')
+        if mime in SNIFF_TYPES:
+            self._check_signature(mime, head)
+
+        decoder = codecs.getincrementaldecoder(self._sniff_encoding(content_type, head))(errors='replace')
+        parser: Optional[MainTextExtractor] = self.extractor()
+        body: list[str] = []
+        received, decoded_chars, truncated = 0, 0, False
+
+        chunk = head
+        while chunk:
+            if received + len(chunk) > self.max_bytes:
+                chunk = chunk[:self.max_bytes - received]
+                truncated = True
+            received += len(chunk)
+            decoded = decoder.decode(chunk)
+            body.append(decoded)
+            decoded_chars += len(decoded)
+            if parser is not None:
+                if decoded_chars >= OFFLOAD_MIN_CHARS:
+                    parser = None
+                else:
+                    parser.feed(decoded)
+            if truncated:
+                break
+            chunk = next(chunks, b'')
+
+        tail = decoder.decode(b'', final=True)
+        body.append(tail)
+        html = ''.join(body)
+        if parser is None:
+            return html, ToolRegistry.run_in_worker(_extract, self.extractor, html), truncated
+        parser.feed(tail)
+        parser.close()
+        return html, parser.text(), truncated
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Grava num temporário e troca de uma vez: leitores em outra thread nunca veem arquivo pela metade"""
+        temp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        temp.write_bytes(data)
+        os.replace(temp, path)
+
+    def _store(self, url: str, meta: dict, body: Optional[str] = None, text: Optional[str] = None):
+        meta_path, body_path, text_path = self._paths(url)
+        written = 0
+        for path, content in ((body_path, body), (text_path, text), (meta_path, json.dumps(meta))):
+            if content is None:
+                continue
+            data = content.encode('utf-8')
+            if path is not meta_path:
+                data = zlib.compress(data)
+            self._write_atomic(path, data)
+            written += len(data)
+        self._account(written)
+
+    def _account(self, written: int):
+        """Soma o que foi gravado e limpa o diretório quando passa do tamanho ou está na hora de olhar a idade"""
+        with self._prune_lock:
+            if self._cache_size is not None:
+                self._cache_size += written
+            if (
+                self._cache_size is None
+                or self._cache_size > self.max_cache_bytes
+                or time.time() - self._last_prune > AGE_CHECK_INTERVAL
+            ):
+                self._prune()
+
+    def _prune(self):
+        """Apaga páginas sem uso há mais de `max_age` e, acima do tamanho máximo, as usadas há mais tempo"""
+        now = time.time()
+        # Uma página são até três arquivos com o mesmo hash; o uso é a data do .json (tocada a cada leitura)
+        # (sem .json, vale o arquivo mais recente: pode ser uma página sendo gravada agora)
+        entries: dict[str, dict] = {}
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                item = entries.setdefault(entry.name.split('.', 1)[0], {'meta': None, 'newest': 0.0, 'size': 0, 'paths': []})
+                if entry.name.endswith('.json'):
+                    item['meta'] = stat.st_mtime
+                item['newest'] = max(item['newest'], stat.st_mtime)
+                item['size'] += stat.st_size
+                item['paths'].append(entry.path)
+
+        pages = sorted(
+            (item['meta'] if item['meta'] is not None else item['newest'], item['size'], item['paths'])
+            for item in entries.values()
+        )
+        total = sum(size for _, size, _ in pages)
+        target = self.max_cache_bytes * EVICTION_TARGET if total > self.max_cache_bytes else total
+        for used, size, paths in pages:
+            if used >= now - self.max_age and total <= target:
+                break
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+
+        self._cache_size = total
+        self._last_prune = now
+
+    def _touch(self, url: str):
+        """Marca a página como usada agora (a limpeza apaga primeiro as usadas há mais tempo)"""
+        try:
+            os.utime(self._paths(url)[0])
+        except OSError:
+            pass
+
+    def fetch(self, url: str) -> str:
+        """Retorna o texto limpo da página; o extrator só roda quando o corpo muda de fato
+        (ou quando a versão dele é diferente da que gerou o texto guardado).
+
+        Raises:
+            UnsupportedContentError: o link não é uma página HTML/texto.
+            requests.RequestException: falha de rede ou status HTTP de erro.
+        """
+        cached = self._load(url)
+        if cached and time.time() < cached['expires']:
+            try:
+                text = self._cached_text(url, cached)
+                self._touch(url)
+                return text
+            except FileNotFoundError:
+                # Apagada pela limpeza entre o _load e a leitura: baixa de novo
+                cached = None
+
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if cached and response.status_code == 304:
+                expires, _ = self._freshness(response.headers)
+                cached['expires'] = expires or 0
+                self._store(url, cached)
+                return self._cached_text(url, cached)
+
+            response.raise_for_status()
+            # Sai do `with` no limite de bytes: a conexão é descartada sem baixar o resto
+            body, text, truncated = self._download(response)
+
+        expires, storable = self._freshness(response.headers)
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        # Sem validadores e já vencida, a cópia nunca seria reaproveitada
+        if storable and (etag or last_modified or (expires or 0) > time.time()):
+            meta = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires': expires or 0,
+                'content_type': response.headers.get('Content-Type', ''),
+                'stored_at': time.time(),
+                'text_version': self.version,
+                'truncated': truncated,
+            }
+            self._store(url, meta, body, text)
+
+        return text
@@ -0,0 +1,166 @@
+"""
+Índice de texto completo (SQLite FTS5) dos arquivos do sandbox
+
+Cada arquivo é dividido em blocos de linhas e os blocos vão para uma tabela FTS5; a busca
+devolve os blocos ordenados por BM25, com um trecho destacado e a linha onde o bloco começa
+(para continuar com `ler_linhas`). O índice é atualizado de forma incremental: `refresh`
+compara mtime e tamanho de cada arquivo com o que foi indexado e só relê o que mudou.
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional
+from config import config
+import threading
+import sqlite3
+import os
+import re
+
+SANDBOX_INDEX_PATH = Path(__file__).parent.parent / 'cache' / 'sandbox_index.db'
+# Um bloco junta linhas até passar deste tamanho (o trecho e a linha devolvidos são por bloco)
+BLOCK_CHARS = 1500
+# O rowid do bloco é (id do arquivo << FILE_SHIFT) + posição, para apagar um arquivo por intervalo
+FILE_SHIFT = 20
+TOKEN = re.compile(r'\w+')
+
+
+def _fts_query(text: str, operator: str) -> str:
+    """Busca livre -> consulta FTS5: cada palavra vira um prefixo entre aspas ("econom"*)"""
+    return f' {operator} '.join(f'"{token}"*' for token in TOKEN.findall(text))
+
+
+class SandboxIndex:
+    """Índice FTS5 incremental de um diretório.
+
+    `max_mb` (config `advanced.sandbox_index.max_mb`): só o começo de arquivos maiores que
+    isso é indexado. Arquivos binários (com bytes nulos no início) entram só pelo nome.
+    """
+
+    def __init__(self, root: Path, path: Path = SANDBOX_INDEX_PATH, max_mb: Optional[float] = None):
+        self.root = root
+        self.max_bytes = int((max_mb if max_mb is not None else config.get('advanced.sandbox_index.max_mb', 32)) * 1024 ** 2)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS blocks USING fts5(
+                body, line UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        ''')
+
+    def _blocks(self, path: Path) -> Iterator[tuple[int, str]]:
+        """(linha inicial, texto) dos blocos do arquivo, lendo no máximo `max_bytes`"""
+        with open(path, 'rb') as f:
+            if b'\0' in f.read(4096):
+                return
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            current: list[str] = []
+            size = 0
+            read = 0
+            first = 1
+            for number, line in enumerate(f, 1):
+                if not current:
+                    first = number
+                current.append(line)
+                size += len(line)
+                read += len(line)
+                if size >= BLOCK_CHARS or read >= self.max_bytes:
+                    yield first, ''.join(current)
+                    current, size = [], 0
+                if read >= self.max_bytes:
+                    return
+            if current:
+                yield first, ''.join(current)
+
+    def _index_file(self, name: str, path: Path, stat: os.stat_result, file_id: Optional[int]):
+        if file_id is None:
+            file_id = self._conn.execute(
+                'INSERT INTO files (name, mtime_ns, size) VALUES (?, ?, ?)', (name, stat.st_mtime_ns, stat.st_size)
+            ).lastrowid
+        else:
+            self._drop_blocks(file_id)
+            self._conn.execute(
+                'UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?', (stat.st_mtime_ns, stat.st_size, file_id)
+            )
+        base = file_id << FILE_SHIFT
+        # O nome entra como primeiro bloco, então dá para achar um arquivo pelo nome também
+        rows = [(base, name.replace('_', ' '), 0)]
+        rows += [(base + position, body, line) for position, (line, body) in enumerate(self._blocks(path), 1)]
+        self._conn.executemany('INSERT INTO blocks (rowid, body, line) VALUES (?, ?, ?)', rows)
+
+    def _drop_blocks(self, file_id: int):
+        self._conn.execute(
+            'DELETE FROM blocks WHERE rowid BETWEEN ? AND ?', (file_id << FILE_SHIFT, ((file_id + 1) << FILE_SHIFT) - 1)
+        )
+
+    def refresh(self) -> int:
+        """Reindexa arquivos novos ou alterados (mtime/tamanho) e esquece os apagados; devolve quantos mudaram"""
+        current: dict[str, tuple[Path, os.stat_result]] = {}
+        for directory, dirs, files in os.walk(self.root):
+            # Ocultos ficam de fora, como em listar_arquivos (inclui os temporários das edições atômicas)
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file in files:
+                if file.startswith('.'):
+                    continue
+                path = Path(directory) / file
+                try:
+                    current[path.relative_to(self.root).as_posix()] = (path, path.stat())
+                except OSError:
+                    continue
+
+        changed = 0
+        with self._lock, self._conn:
+            known = {
+                name: (file_id, mtime_ns, size)
+                for file_id, name, mtime_ns, size in self._conn.execute('SELECT id, name, mtime_ns, size FROM files')
+            }
+            for name, (file_id, _, _) in known.items():
+                if name not in current:
+                    self._drop_blocks(file_id)
+                    self._conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+                    changed += 1
+
+            for name, (path, stat) in current.items():
+                file_id, mtime_ns, size = known.get(name, (None, None, None))
+                if (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                try:
+                    self._index_file(name, path, stat, file_id)
+                    changed += 1
+                except OSError:
+                    continue
+        return changed
+
+    def search(self, query: str, limit: int = 30) -> list[tuple[str, int, str, float]]:
+        """Blocos que casam com todas as palavras da busca (ou com qualquer uma, se nenhum casar).
+
+        Returns:
+            (arquivo, linha inicial do bloco ou 0 se casou pelo nome, trecho com [destaques], pontuação BM25)
+            do mais para o menos relevante
+        """
+        rows = []
+        with self._lock:
+            for operator in ('AND', 'OR'):
+                fts = _fts_query(query, operator)
+                if not fts:
+                    return []
+                rows = self._conn.execute(
+                    "SELECT blocks.rowid, line, snippet(blocks, 0, '[', ']', ' … ', 16), bm25(blocks) "
+                    'FROM blocks WHERE blocks MATCH ? ORDER BY rank LIMIT ?',
+                    (fts, limit)
+                ).fetchall()
+                if rows:
+                    break
+            names = dict(self._conn.execute('SELECT id, name FROM files'))
+
+        # bm25() do FTS5 é negativo (menor = melhor); devolve positivo como no resto do projeto
+        return [
+            (names[rowid >> FILE_SHIFT], line, ' '.join(snippet.split()), -score)
+            for rowid, line, snippet, score in rows if rowid >> FILE_SHIFT in names
+        ]
@@ -0,0 +1,123 @@
+"""
+Cliente DDGS compartilhado com limite de taxa e novas tentativas
+
+Um único `DDGS` atende todas as pesquisas, então as instâncias dos mecanismos (e suas
+conexões) são reaproveitadas. Antes de cada requisição um balde de fichas (token bucket)
+segura o ritmo; falhas passageiras (limite de taxa, timeout, rede) são repetidas com
+espera exponencial com jitter até um prazo total, e o erro final diz se vale tentar de novo.
+"""
+
+from ddgs import DDGS, exceptions
+from typing import Any, Literal, Optional
+from config import config
+import threading
+import random
+import time
+import re
+
+SearchCategory = Literal['text', 'news', 'images', 'videos']
+
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+RATE_LIMIT_HINTS = re.compile(r'ratelimit|rate limit|too many requests|\b429\b|\b202\b', re.IGNORECASE)
+NO_RESULTS_HINTS = re.compile(r'no results', re.IGNORECASE)
+
+
+class NoResultsError(exceptions.DDGSException):
+    """A pesquisa funcionou, mas não encontrou nada (reformular a busca pode ajudar)"""
+
+
+class RateLimitedError(exceptions.DDGSException):
+    """O mecanismo de busca limitou as requisições; tentar de novo logo não adianta"""
+
+
+class SearchUnavailableError(exceptions.DDGSException):
+    """Timeout ou falha de rede que persistiu depois das novas tentativas"""
+
+
+class TokenBucket:
+    """Libera até `rate` requisições por segundo, com rajadas de até `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float) -> bool:
+        """Espera uma ficha; False se ela só sairia depois de `deadline` (relógio monotônico)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SearchClient:
+    """Pesquisas DDGS com uma sessão longa, limite de taxa e novas tentativas dentro de um prazo.
+
+    Config `advanced.search_client`: `timeout` por requisição, `rate_per_second` e `burst` do
+    balde de fichas, `retries` (novas tentativas) e `deadline` (prazo total, em segundos).
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[float] = None,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.timeout = timeout if timeout is not None else config.get('advanced.search_client.timeout', 5)
+        self.retries = retries if retries is not None else config.get('advanced.search_client.retries', 3)
+        self.deadline = deadline if deadline is not None else config.get('advanced.search_client.deadline', 15)
+        self.bucket = TokenBucket(
+            rate_per_second if rate_per_second is not None else config.get('advanced.search_client.rate_per_second', 1),
+            burst if burst is not None else config.get('advanced.search_client.burst', 3),
+        )
+        self._ddgs = DDGS(timeout=self.timeout)
+
+    @staticmethod
+    def _classify(error: exceptions.DDGSException) -> type[exceptions.DDGSException]:
+        if isinstance(error, exceptions.RatelimitException) or RATE_LIMIT_HINTS.search(str(error)):
+            return RateLimitedError
+        if isinstance(error, exceptions.TimeoutException):
+            return SearchUnavailableError
+        if NO_RESULTS_HINTS.search(str(error)):
+            return NoResultsError
+        return SearchUnavailableError
+
+    def search(self, category: SearchCategory, **kwargs: Any) -> list[dict[str, Any]]:
+        """Executa `DDGS.<category>(**kwargs)` respeitando o limite de taxa.
+
+        Raises:
+            NoResultsError: nada encontrado (não é repetido).
+            RateLimitedError: limitado mesmo depois das novas tentativas.
+            SearchUnavailableError: timeout ou erro de rede persistente.
+        """
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            if not self.bucket.acquire(deadline):
+                raise RateLimitedError('limite local de pesquisas por segundo atingido; tente mais tarde')
+            try:
+                return getattr(self._ddgs, category)(**kwargs)
+            except exceptions.DDGSException as e:
+                kind = self._classify(e)
+                if kind is NoResultsError:
+                    raise NoResultsError(str(e)) from e
+
+                # Full jitter: espera aleatória até o teto exponencial, para não sincronizar com outras threads
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                attempt += 1
+                if attempt > self.retries or time.monotonic() + delay > deadline:
+                    raise kind(str(e)) from e
+                time.sleep(delay)
@@ -0,0 +1,152 @@
+"""
+Histórico de pesquisas com IDs por pesquisa e cache de resultados
+
+Cada pesquisa recebe um número e seus resultados viram IDs com prefixo ("s3-0", "s3-1"...),
+então um ID de uma pesquisa antiga continua apontando para o mesmo link mesmo depois de
+outras pesquisas. Resultados ficam em memória e num SQLite (sobrevivem ao reinício), e a
+mesma (busca, backend, período) dentro do TTL é respondida sem ir ao DuckDuckGo.
+"""
+
+from pathlib import Path
+from typing import Optional
+from config import config
+import threading
+import sqlite3
+import json
+import time
+import re
+
+SEARCH_DB_PATH = Path(__file__).parent.parent / 'cache' / 'searches.db'
+RESULT_ID = re.compile(r's(\d+)-(\d+)')
+
+
+class SearchStore:
+    """Guarda pesquisas e resolve IDs de resultado para links.
+
+    - `ttl` (config `advanced.search_cache.ttl`, segundos): por quanto tempo a mesma pesquisa
+      é reaproveitada em vez de repetida.
+    - `retention_days` (config `advanced.search_cache.retention_days`): pesquisas mais velhas
+      que isso são apagadas ao abrir (e seus IDs deixam de resolver).
+    """
+
+    def __init__(self, path: Path = SEARCH_DB_PATH, ttl: Optional[float] = None, retention_days: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else config.get('advanced.search_cache.ttl', 900)
+        retention = retention_days if retention_days is not None else config.get('advanced.search_cache.retention_days', 7)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS searches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                period TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_searches_key ON searches(query, backend, period, created_at);
+            CREATE TABLE IF NOT EXISTS results (
+                search_id INTEGER NOT NULL REFERENCES searches(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (search_id, position)
+            ) WITHOUT ROWID;
+        ''')
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        with self._conn:
+            self._conn.execute('DELETE FROM searches WHERE created_at < ?', (time.time() - retention * 86400,))
+
+        # (busca, backend, período) -> (id da pesquisa, criada em, resultados)
+        self._searches: dict[tuple[str, str, str], tuple[int, float, list[dict]]] = {}
+        # "s3-1" -> link
+        self._links: dict[str, str] = {}
+        self.latest: Optional[int] = None
+
+    @staticmethod
+    def _key(query: str, backend: str, period: Optional[str]) -> tuple[str, str, str]:
+        return ' '.join(query.lower().split()), backend, period or ''
+
+    def _remember(self, key: tuple[str, str, str], search_id: int, created_at: float, results: list[dict]):
+        self._searches[key] = (search_id, created_at, results)
+        for item in results:
+            if item.get('link'):
+                self._links[item['id']] = item['link']
+
+    def get(self, query: str, backend: str, period: Optional[str]) -> Optional[list[dict]]:
+        """Resultados da mesma pesquisa feita há menos de `ttl` segundos, ou None"""
+        key = self._key(query, backend, period)
+        now = time.time()
+
+        with self._lock:
+            cached = self._searches.get(key)
+            if cached is None:
+                row = self._conn.execute(
+                    'SELECT id, created_at FROM searches WHERE query = ? AND backend = ? AND period = ? '
+                    'ORDER BY created_at DESC LIMIT 1',
+                    key
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl:
+                    return None
+                results = [json.loads(data) for (data,) in self._conn.execute(
+                    'SELECT data FROM results WHERE search_id = ? ORDER BY position', (row[0],)
+                )]
+                self._remember(key, row[0], row[1], results)
+                cached = self._searches[key]
+
+            search_id, created_at, results = cached
+            if now - created_at > self.ttl:
+                return None
+            self.latest = search_id
+            # Cópias: quem chama costuma encurtar os links antes de mostrar
+            return [dict(item) for item in results]
+
+    def add(self, query: str, backend: str, period: Optional[str], results: list[dict]) -> list[dict]:
+        """Registra uma pesquisa nova, numera os resultados ("s<n>-<i>") e devolve cópias deles"""
+        key = self._key(query, backend, period)
+        now = time.time()
+
+        with self._lock, self._conn:
+            search_id = self._conn.execute(
+                'INSERT INTO searches (query, backend, period, created_at) VALUES (?, ?, ?, ?)', (*key, now)
+            ).lastrowid
+            assert search_id is not None
+
+            stored = []
+            for position, item in enumerate(results):
+                item = {**item, 'id': f's{search_id}-{position}'}
+                stored.append(item)
+            self._conn.executemany(
+                'INSERT INTO results (search_id, position, data) VALUES (?, ?, ?)',
+                [(search_id, position, json.dumps(item, ensure_ascii=False)) for position, item in enumerate(stored)]
+            )
+            self._remember(key, search_id, now, stored)
+            self.latest = search_id
+
+        return [dict(item) for item in stored]
+
+    def resolve(self, result_id: str) -> Optional[str]:
+        """Link de um ID ("s3-1"); um número sozinho ("1") se refere à pesquisa mais recente"""
+        result_id = result_id.strip()
+        if result_id.isdigit():
+            if self.latest is None:
+                return None
+            result_id = f's{self.latest}-{result_id}'
+
+        if link := self._links.get(result_id):
+            return link
+
+        # ID de uma sessão anterior: busca direto no banco
+        match = RESULT_ID.fullmatch(result_id)
+        if not match:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM results WHERE search_id = ? AND position = ?',
+                (int(match.group(1)), int(match.group(2)))
+            ).fetchone()
+        if row is None:
+            return None
+        link = json.loads(row[0]).get('link')
+        if link:
+            self._links[result_id] = link
+        return link
@@ -0,0 +1,229 @@
+"""
+Resumo map-reduce de textos longos, com cache dos resumos parciais
+
+O texto é dividido em chunks de tamanho em tokens cujas fronteiras dependem do conteúdo
+(uma edição só muda os chunks ao redor dela), cada chunk é resumido em paralelo com
+concorrência limitada e os resumos são combinados em níveis até sobrar um só. Todo resumo,
+de chunk ou de grupo, fica num SQLite indexado por (modelo, hash do prompt, foco): reler
+um arquivo sem mudanças não chama o modelo, e um arquivo pouco editado refaz só o que mudou.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+from .model_residency import residency
+from .text_chunker import approx_tokens, iter_chunks
+from .tool_registry import ToolRegistry
+from itertools import islice
+from config import config
+from pathlib import Path
+import threading
+import hashlib
+import sqlite3
+import time
+import zlib
+
+SUMMARY_DB_PATH = Path(__file__).parent.parent / 'cache' / 'summaries.db'
+# Passado o tamanho mínimo, uma linha vira fronteira quando o hash dela cai em 1 de cada N
+BOUNDARY_DIVISOR = 8
+# A partir deste tamanho (bytes) o arquivo é dividido em chunks num worker do ToolRegistry
+OFFLOAD_MIN_BYTES = 64 * 1024
+
+MAP_PROMPT = """Resuma os pontos principais do trecho abaixo, parte do arquivo '{name}'{focus}:
+---
+{text}
+---
+Responda só com o resumo, em poucas frases."""
+
+REDUCE_PROMPT = """Os textos abaixo são resumos de partes seguidas do arquivo '{name}'. Junte-os num único resumo{focus}, sem repetir informações:
+---
+{text}
+---
+Responda só com o resumo."""
+
+FINAL_PROMPT = """Resuma concisamente o conteúdo abaixo do arquivo '{name}':
+---
+{text}
+---
+Forneça um resumo claro em 2-3 parágrafos{focus}."""
+
+FINAL_REDUCE_PROMPT = """Os textos abaixo são resumos de partes seguidas do arquivo '{name}', em ordem:
+---
+{text}
+---
+Combine-os num resumo claro do arquivo inteiro em 2-3 parágrafos{focus}."""
+
+
+def iter_summary_chunks(lines: Iterable[str], max_tokens: int) -> Iterator[tuple[int, str]]:
+    """Gera (número da primeira linha, texto) de chunks de até `max_tokens` aproximados.
+
+    Depois de metade do tamanho, o chunk termina na primeira linha cujo hash cai em 1 de
+    cada `BOUNDARY_DIVISOR` (linhas em branco sempre caem, então parágrafos viram fronteiras).
+    Como a decisão só depende da própria linha, uma edição desloca as fronteiras só até o
+    próximo corte e os chunks depois dele continuam idênticos (e no cache).
+    """
+    current: list[str] = []
+    size = 0
+    first = 1
+    for number, line in enumerate(lines, 1):
+        pieces = [line] if approx_tokens(line) <= max_tokens else list(iter_chunks(line, max_tokens, 0))
+        for piece in pieces:
+            tokens = approx_tokens(piece)
+            if current and size + tokens > max_tokens:
+                yield first, '\n'.join(current)
+                current, size = [], 0
+            if not current:
+                first = number
+            current.append(piece)
+            size += tokens
+
+        if size >= max_tokens // 2 and zlib.crc32(line.strip().encode('utf-8')) % BOUNDARY_DIVISOR == 0:
+            yield first, '\n'.join(current)
+            current, size = [], 0
+
+    if current:
+        yield first, '\n'.join(current)
+
+
+def read_summary_chunks(path: Path, max_tokens: int, limit: int) -> list[tuple[int, str]]:
+    """Até `limit` chunks de `iter_summary_chunks` lidos direto do arquivo (para rodar num worker)"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return list(islice(iter_summary_chunks((line.rstrip('\r\n') for line in f), max_tokens), limit))
+
+
+class SummaryCache:
+    """Resumos já gerados, indexados por (modelo, hash do prompt, foco).
+
+    `retention_days` (config `advanced.summarizer.retention_days`): resumos sem uso há mais
+    tempo que isso são apagados ao abrir.
+    """
+
+    def __init__(self, path: Path = SUMMARY_DB_PATH, retention_days: Optional[float] = None):
+        retention = retention_days if retention_days is not None else config.get('advanced.summarizer.retention_days', 30)
+        self.hits = 0
+        self.misses = 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                focus TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, hash, focus)
+            ) WITHOUT ROWID
+        ''')
+        with self._conn:
+            self._conn.execute('DELETE FROM summaries WHERE last_used < ?', (time.time() - retention * 86400,))
+
+    @staticmethod
+    def _hash(prompt: str) -> str:
+        return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, model: str, prompt: str, focus: str) -> Optional[str]:
+        key = (model, self._hash(prompt), focus)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT summary FROM summaries WHERE model = ? AND hash = ? AND focus = ?', key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE summaries SET last_used = ? WHERE model = ? AND hash = ? AND focus = ?', (time.time(), *key)
+            )
+            return row[0]
+
+    def put(self, model: str, prompt: str, focus: str, summary: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO summaries (model, hash, focus, summary, last_used) VALUES (?, ?, ?, ?, ?)',
+                (model, self._hash(prompt), focus, summary, time.time())
+            )
+
+
+class MapReduceSummarizer:
+    """Resume textos de qualquer tamanho em etapas: chunks -> resumos -> grupos -> resumo final.
+
+    Config `advanced.summarizer`: `chunk_tokens` (tamanho de cada chunk), `reduce_tokens`
+    (quanto texto de resumos entra em cada chamada de combinação), `workers` (chamadas
+    simultâneas ao modelo) e `max_chunks` (acima disso só o começo do texto é resumido).
+    """
+
+    def __init__(
+        self,
+        cache: Optional[SummaryCache] = None,
+        chunk_tokens: Optional[int] = None,
+        reduce_tokens: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_chunks: Optional[int] = None,
+    ):
+        self.cache = cache or SummaryCache()
+        self.chunk_tokens = chunk_tokens or config.get('advanced.summarizer.chunk_tokens', 1500)
+        self.reduce_tokens = reduce_tokens or config.get('advanced.summarizer.reduce_tokens', 2500)
+        self.workers = workers or config.get('advanced.summarizer.workers', 2)
+        self.max_chunks = max_chunks or config.get('advanced.summarizer.max_chunks', 40)
+
+    def _respond(self, model_key: str, prompt: str, focus: str) -> str:
+        if (cached := self.cache.get(model_key, prompt, focus)) is not None:
+            return cached
+        summary = str(residency.llm(model_key).respond(prompt)).strip()
+        self.cache.put(model_key, prompt, focus, summary)
+        return summary
+
+    def _group(self, summaries: list[str]) -> list[str]:
+        """Junta resumos vizinhos em grupos de até `reduce_tokens` (pelo menos dois por grupo, para sempre encolher)"""
+        groups: list[list[str]] = []
+        size = 0
+        for summary in summaries:
+            tokens = approx_tokens(summary)
+            if groups and (len(groups[-1]) < 2 or size + tokens <= self.reduce_tokens):
+                groups[-1].append(summary)
+                size += tokens
+            else:
+                groups.append([summary])
+                size = tokens
+        return ['\n\n'.join(group) for group in groups]
+
+    def summarize(
+        self, model_key: str, lines: Iterable[str], name: str, focus: Optional[str] = None
+    ) -> tuple[str, Optional[int]]:
+        """Resume as linhas de um texto.
+
+        Returns:
+            (resumo, número da primeira linha que ficou de fora por `max_chunks`, ou None)
+        """
+        chunks = list(islice(iter_summary_chunks(lines, self.chunk_tokens), self.max_chunks + 1))
+        return self._summarize_chunks(model_key, chunks, name, focus)
+
+    def summarize_file(self, model_key: str, path: Path, name: str, focus: Optional[str] = None) -> tuple[str, Optional[int]]:
+        """Como `summarize`, lendo o arquivo; arquivos grandes são divididos em chunks num worker"""
+        if path.stat().st_size >= OFFLOAD_MIN_BYTES:
+            chunks = ToolRegistry.run_in_worker(read_summary_chunks, path, self.chunk_tokens, self.max_chunks + 1)
+        else:
+            chunks = read_summary_chunks(path, self.chunk_tokens, self.max_chunks + 1)
+        return self._summarize_chunks(model_key, chunks, name, focus)
+
+    def _summarize_chunks(
+        self, model_key: str, chunks: list[tuple[int, str]], name: str, focus: Optional[str]
+    ) -> tuple[str, Optional[int]]:
+        omitted_from = chunks.pop()[0] if len(chunks) > self.max_chunks else None
+        if not chunks:
+            return '', None
+
+        focus = focus or ''
+        focused = f' focando em "{focus}"' if focus else ''
+        if len(chunks) == 1:
+            return self._respond(model_key, FINAL_PROMPT.format(name=name, text=chunks[0][1], focus=focused), focus), None
+
+        def respond(template: str):
+            return lambda text: self._respond(model_key, template.format(name=name, text=text, focus=focused), focus)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            summaries = list(pool.map(respond(MAP_PROMPT), [text for _, text in chunks]))
+            while len(groups := self._group(summaries)) > 1:
+                summaries = list(pool.map(respond(REDUCE_PROMPT), groups))
+        return respond(FINAL_REDUCE_PROMPT)(groups[0]), omitted_from
@@ -0,0 +1,147 @@
+"""
+Divisão de texto em chunks para embedding, respeitando frases e com sobreposição
+
+Os chunks saem de um gerador (nada de lista com todas as palavras do texto) e são medidos
+em tokens aproximados, para caber no contexto do modelo de embedding. Cada chunk novo
+repete as últimas frases do anterior (até `overlap_tokens`), então um fato que cai bem
+na fronteira entre dois chunks continua inteiro em pelo menos um deles.
+"""
+
+from typing import Iterable, Iterator, Optional
+from config import config
+import re
+
+# Média de caracteres por token em português/inglês nos tokenizadores BPE comuns
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = config.get('advanced.chunking.max_tokens', 128)
+OVERLAP_TOKENS = config.get('advanced.chunking.overlap_tokens', 32)
+
+# Fim de frase: pontuação final seguida de espaço e de algo que começa frase nova
+SENTENCE_END = re.compile(r'(?<=[.!?…])["”\')\]]*\s+(?=["“(\[]?[A-ZÀ-ÖØ-Þ0-9])')
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+# Ponto que não termina frase: títulos e abreviações comuns ("Dr. Silva", "Av. Paulista")
+ABBREVIATION = re.compile(
+    r'\b(?:dr|dra|sr|sra|srta|prof|profa|eng|av|gen|cel|cap|st|mr|mrs|ms|jr|vs)\.$',
+    re.IGNORECASE
+)
+# Abreviações que só valem antes de um número ("p. 12", "fig. 3")
+NUMBERED_ABBREVIATION = re.compile(r'\b(?:nº|p|pp|vol|fig)\.$', re.IGNORECASE)
+# Inicial maiúscula no começo, depois de outra inicial ou de palavra com maiúscula ("J. K.", "John F."),
+# nunca depois de palavra minúscula longa ("o plano B.", "a vitamina C.")
+INITIAL = re.compile(r'(?:^|(?<![a-zà-öø-ÿ]{4})\s)[A-ZÀ-ÖØ-Þ]\.$')
+# O que precisa vir depois: um nome (ou outra inicial) e um número
+NAME_START = re.compile(r'[A-ZÀ-ÖØ-Þ](?:[a-zà-öø-ÿ]|\.)')
+NUMBER_START = re.compile(r'\d')
+WORD = re.compile(r'\S+')
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def _split_lazy(pattern: re.Pattern, text: str) -> Iterator[str]:
+    """Como `pattern.split(text)`, mas devolvendo os pedaços sob demanda"""
+    start = 0
+    for match in pattern.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+def iter_sentences(text: str | Iterable[str]) -> Iterator[str]:
+    """Frases do texto, com espaços normalizados; aceita o texto inteiro ou seus parágrafos aos poucos"""
+    paragraphs = _split_lazy(PARAGRAPH_BREAK, text) if isinstance(text, str) else text
+    for paragraph in paragraphs:
+        # Frase que terminou numa abreviação espera a próxima; `follows` diz o que a próxima
+        # precisa ter para as duas serem juntadas (None: junta sempre)
+        pending = ''
+        follows: Optional[re.Pattern] = None
+        for sentence in _split_lazy(SENTENCE_END, paragraph):
+            sentence = ' '.join(sentence.split())
+            if not sentence:
+                continue
+            if pending:
+                if follows is None or follows.match(sentence):
+                    sentence = f'{pending} {sentence}'
+                else:
+                    yield pending
+                pending = ''
+
+            if ABBREVIATION.search(sentence):
+                pending, follows = sentence, None
+            elif NUMBERED_ABBREVIATION.search(sentence):
+                pending, follows = sentence, NUMBER_START
+            elif INITIAL.search(sentence):
+                pending, follows = sentence, NAME_START
+            else:
+                yield sentence
+        if pending:
+            yield pending
+
+
+def _split_long(sentence: str, max_tokens: int, overlap_tokens: int) -> Iterator[str]:
+    """Frase maior que um chunk inteiro: corta por palavras, com a mesma sobreposição"""
+    words: list[tuple[str, int]] = []
+    size = 0
+    for match in WORD.finditer(sentence):
+        word = match.group()
+        tokens = approx_tokens(word)
+        if words and size + tokens > max_tokens:
+            yield ' '.join(w for w, _ in words)
+            kept, kept_size = [], 0
+            for w, w_tokens in reversed(words):
+                if kept_size + w_tokens > overlap_tokens:
+                    break
+                kept.append((w, w_tokens))
+                kept_size += w_tokens
+            words, size = kept[::-1], kept_size
+        words.append((word, tokens))
+        size += tokens
+    if words:
+        yield ' '.join(w for w, _ in words)
+
+
+def iter_chunks(
+    text: str | Iterable[str],
+    max_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = OVERLAP_TOKENS,
+) -> Iterator[str]:
+    """Gera chunks de até `max_tokens` (aproximados) sem quebrar frases no meio.
+
+    Args:
+        text: texto completo ou um iterável de parágrafos (ex.: vindo de um download em streaming).
+        max_tokens: tamanho máximo de cada chunk.
+        overlap_tokens: quanto do fim do chunk anterior (em frases inteiras) abre o próximo.
+    """
+    current: list[tuple[str, int]] = []
+    size = 0
+
+    for sentence in iter_sentences(text):
+        tokens = approx_tokens(sentence)
+        pieces = [(sentence, tokens)] if tokens <= max_tokens else [
+            (piece, approx_tokens(piece)) for piece in _split_long(sentence, max_tokens, overlap_tokens)
+        ]
+
+        for piece, piece_tokens in pieces:
+            if current and size + piece_tokens > max_tokens:
+                yield ' '.join(part for part, _ in current)
+
+                # Mantém as últimas frases que cabem na sobreposição (e ainda deixam espaço para a nova)
+                kept, kept_size = [], 0
+                for part, part_tokens in reversed(current):
+                    if kept_size + part_tokens > overlap_tokens or kept_size + part_tokens + piece_tokens > max_tokens:
+                        break
+                    kept.append((part, part_tokens))
+                    kept_size += part_tokens
+                current, size = kept[::-1], kept_size
+
+            current.append((piece, piece_tokens))
+            size += piece_tokens
+
+    if current:
+        yield ' '.join(part for part, _ in current)
+
+
+def split_chunks(text: str, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = OVERLAP_TOKENS) -> list[str]:
+    """Os chunks de `iter_chunks` numa lista (função de módulo, para poder rodar num worker)"""
+    return list(iter_chunks(text, max_tokens, overlap_tokens))
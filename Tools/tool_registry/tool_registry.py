@@ -1,16 +1,50 @@
-from typing import Callable, Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Any, Optional
 from functools import wraps
 from config import config
 from pathlib import Path
+import multiprocessing
+import threading
 import importlib
 import pkgutil
 import inspect
+import atexit
+
+# Instâncias das classes de ferramentas dentro de cada worker (criadas na primeira chamada)
+_worker_instances: Dict[str, Any] = {}
+
+def _warm_up() -> int:
+    """Tarefa vazia: força o worker a subir e importar o básico antes da primeira chamada real"""
+    return multiprocessing.current_process().pid or 0
+
+def _run_tool(module_name: str, qualname: str, args: tuple, kwargs: dict) -> Any:
+    """
+    Roda, dentro do worker, a função original de uma ferramenta @tool(cpu_bound=True).
+    Se for método, usa uma instância da classe própria do worker (o `self` do processo
+    principal, com conexões e caches, não é serializável).
+    """
+    obj: Any = importlib.import_module(module_name)
+    *owner_path, name = qualname.split('.')
+    for part in owner_path:
+        obj = getattr(obj, part)
+    func = inspect.unwrap(getattr(obj, name))
+    if not owner_path:
+        return func(*args, **kwargs)
+
+    owner = f'{module_name}.{".".join(owner_path)}'
+    if owner not in _worker_instances:
+        _worker_instances[owner] = obj()
+    return func(_worker_instances[owner], *args, **kwargs)
 
 class ToolRegistry:
     """Registry central para todas as ferramentas do sistema"""
     _instance = None
     _tools: Dict[str, Callable] = {}
     _tool_instances: Dict[str, Any] = {}
+    _process_pool: Optional[ProcessPoolExecutor] = None
+    _pool_lock = threading.Lock()
+    _shutdown_registered = False
     
     def __new__(cls):
         if cls._instance is None:
@@ -48,28 +82,110 @@ class ToolRegistry:
         print(f'{config.emojis['loading']}{config.colors['dim']}Inicializando ferramentas...{config.colors['default']}')
         return list(cls._tools.values())
     
+    @staticmethod
+    def is_worker_process() -> bool:
+        """
+        True dentro de um worker do pool, inclusive enquanto ele ainda reimporta o programa
+        principal (com spawn, antes disso `multiprocessing.parent_process()` ainda é None).
+        """
+        return multiprocessing.current_process().name != 'MainProcess'
+
+    @classmethod
+    def worker_pool(cls) -> Optional[ProcessPoolExecutor]:
+        """
+        Pool de processos persistente para trabalho pesado de CPU, criado no primeiro uso
+        (sessões que nunca precisam dele não sobem processo nenhum). Ao ser criado, já sobe
+        todos os workers em segundo plano; depois fica aquecido até o fim do programa.
+        None se desativado (config `advanced.worker_pool.enabled`) ou se já estamos num worker.
+        """
+        if not config.get('advanced.worker_pool.enabled', True) or cls.is_worker_process():
+            return None
+        with cls._pool_lock:
+            if cls._process_pool is None:
+                workers = config.get('advanced.worker_pool.workers', 2)
+                cls._process_pool = ProcessPoolExecutor(max_workers=workers)
+                for _ in range(workers):
+                    cls._process_pool.submit(_warm_up)
+                # Um pool quebrado é recriado, mas o encerramento na saída só precisa ser registrado uma vez
+                if not cls._shutdown_registered:
+                    atexit.register(cls.shutdown_worker_pool)
+                    cls._shutdown_registered = True
+            return cls._process_pool
+
+    @classmethod
+    def run_in_worker(cls, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Executa fn(*args, **kwargs) num processo do pool e espera o resultado.
+        
+        Libera o interpretador principal (e o GIL) para o streaming da resposta e o cliente
+        do LM Studio enquanto o trabalho pesado roda. `fn` precisa ser uma função de módulo e
+        argumentos/resultado precisam ser serializáveis com pickle. Sem pool (desativado ou
+        já dentro de um worker), roda aqui mesmo.
+        
+        Raises:
+            BrokenProcessPool: o worker morreu no meio (ex.: falta de memória). O pool quebrado
+                é descartado e a próxima chamada sobe um novo; repetir aqui derrubaria o processo principal.
+        """
+        pool = cls.worker_pool()
+        if pool is None:
+            return fn(*args, **kwargs)
+        try:
+            return pool.submit(fn, *args, **kwargs).result()
+        except BrokenProcessPool:
+            with cls._pool_lock:
+                if cls._process_pool is pool:
+                    cls._process_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    @classmethod
+    def shutdown_worker_pool(cls) -> None:
+        """Encerra os workers (chamado automaticamente na saída)"""
+        with cls._pool_lock:
+            pool, cls._process_pool = cls._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
     @classmethod
     def clear_registry(cls):
         """Limpa o registry (útil para testes)"""
         cls._tools.clear()
         cls._tool_instances.clear()
 
-def tool(func: Callable) -> Callable:
+def tool(func: Optional[Callable] = None, *, cpu_bound: bool = False) -> Callable:
     """
     Decorator que registra automaticamente uma função como ferramenta.
-    
+
+    Com `cpu_bound=True` a chamada inteira roda no pool de processos do ToolRegistry
+    (argumentos e resultado precisam ser serializáveis com pickle). Em métodos, o worker
+    usa uma instância própria da classe: só marque ferramentas cujo estado fica em disco.
+
     Usage:
         @tool
         def my_function(param1: str) -> str:
             '''Tool description'''
             return result
+
+        @tool(cpu_bound=True)
+        def heavy_function(self, text: str) -> str:
+            ...
     """
+    if func is None:
+        return lambda f: tool(f, cpu_bound=cpu_bound)
+
+    is_method = '.' in func.__qualname__ and '<locals>' not in func.__qualname__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        return func(*args, **kwargs)
-    
+        if not cpu_bound or ToolRegistry.worker_pool() is None:
+            return func(*args, **kwargs)
+        return ToolRegistry.run_in_worker(
+            _run_tool, func.__module__, func.__qualname__, args[1:] if is_method else args, kwargs
+        )
+
     # Marcar como tool para detecção automática
     wrapper._is_tool = True
+    wrapper._cpu_bound = cpu_bound
     
     # Se for função livre (não método), registrar diretamente
     if not hasattr(func, '__self__'):
@@ -151,6 +267,6 @@ def auto_load_tools(tools_package_name: str = 'Tools') -> List[Callable]:
                 
     except ImportError:
         pass
-        
+    
     tools = ToolRegistry.get_all_tools()
     return tools
\ No newline at end of file
@@ -0,0 +1,300 @@
+"""
+Índice vetorial aproximado (IVF + int8) para embeddings
+
+Os vetores ficam quantizados num arquivo mapeado em memória ao lado do memories.db,
+então só as listas consultadas em cada busca são lidas do disco.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence
+import numpy as np
+import json
+import os
+
+VECTOR_INDEX_PATH = Path(__file__).parent.parent / 'memory' / 'memories_vectors'
+
+# Abaixo disso a busca é exata (força bruta); ao passar, o índice treina os centroides
+MIN_TRAIN_SIZE = 4096
+# Vetores inseridos depois do último rebuild ficam numa "cauda"; passando dessa fração, compacta
+REBUILD_TAIL_RATIO = 0.1
+# Retreina os centroides quando o índice cresce esse tanto desde o último treino
+RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 65536
+# Linhas processadas por vez ao varrer/reescrever o arquivo (limita a memória usada)
+BLOCK_SIZE = 65536
+INITIAL_CAPACITY = 1024
+
+# Arquivos com um registro por vetor: (nome, dtype, vetorial?)
+_COLUMNS = (
+    ('vectors', np.int8, True),
+    ('scales', np.float32, False),
+    ('ids', np.int64, False),
+    ('lists', np.int32, False),
+    ('alive', np.uint8, False),
+)
+
+
+class VectorIndex:
+    """Índice IVF para similaridade coseno, com vetores normalizados e quantizados em int8.
+
+    Layout em disco (diretório `path`):
+      - vectors/scales/ids/lists/alive.bin: um registro por vetor, mapeados em memória
+      - centroids.npy e offsets.npy: as listas invertidas. As posições [0, sorted_count)
+        ficam agrupadas por lista; as inseridas depois formam uma cauda varrida por força bruta
+      - meta.json: dimensão, contagens e capacidade
+
+    Remoções só marcam o vetor como morto; o espaço é recuperado no próximo rebuild.
+    """
+
+    def __init__(self, path: Path = VECTOR_INDEX_PATH, dim: Optional[int] = None, n_probe: int = 16):
+        self.path = path
+        self.n_probe = n_probe
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        meta_path = self.path / 'meta.json'
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        elif dim is None:
+            raise ValueError('dim é obrigatório para criar um índice novo')
+        else:
+            meta = {'dim': dim, 'count': 0, 'sorted_count': 0, 'trained_count': 0, 'capacity': INITIAL_CAPACITY}
+
+        self.dim: int = meta['dim']
+        self.count: int = meta['count']
+        self.sorted_count: int = meta['sorted_count']
+        self.trained_count: int = meta['trained_count']
+        self.capacity: int = meta['capacity']
+
+        self.centroids: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+        if (self.path / 'centroids.npy').exists():
+            self.centroids = np.load(self.path / 'centroids.npy')
+            self.offsets = np.load(self.path / 'offsets.npy')
+
+        self._arrays: dict[str, np.memmap] = {}
+        self._open_arrays(self.capacity)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._arrays['alive'][:self.count]))
+
+    # ---------- armazenamento ----------
+
+    def _column_file(self, name: str, suffix: str = '') -> Path:
+        return self.path / f'{name}.bin{suffix}'
+
+    def _open_arrays(self, capacity: int, suffix: str = '') -> dict[str, np.memmap]:
+        """Abre (criando ou aumentando) os arquivos por vetor com a capacidade pedida"""
+        arrays = {}
+        for name, dtype, is_vector in _COLUMNS:
+            shape = (capacity, self.dim) if is_vector else (capacity,)
+            file = self._column_file(name, suffix)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(file, 'ab') as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            arrays[name] = np.memmap(file, dtype=dtype, mode='r+', shape=shape)
+
+        if not suffix:
+            self._arrays = arrays
+        return arrays
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        while self.capacity < needed:
+            self.capacity *= 2
+        self.flush()
+        # Solta os mapeamentos antigos antes de aumentar os arquivos (necessário no Windows)
+        self._arrays = {}
+        self._open_arrays(self.capacity)
+
+    def _save_meta(self):
+        meta = {
+            'dim': self.dim,
+            'count': self.count,
+            'sorted_count': self.sorted_count,
+            'trained_count': self.trained_count,
+            'capacity': self.capacity,
+        }
+        (self.path / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+    def flush(self):
+        """Grava no disco o que ainda está só nas páginas mapeadas"""
+        for array in self._arrays.values():
+            array.flush()
+        self._save_meta()
+
+    # ---------- quantização ----------
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """int8 simétrico por vetor: v ≈ q * scale"""
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales = np.maximum(scales, 1e-12).astype(np.float32)
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales
+
+    def _dequantize(self, start: int, stop: int) -> np.ndarray:
+        vectors = self._arrays['vectors'][start:stop].astype(np.float32)
+        return vectors * self._arrays['scales'][start:stop, None]
+
+    # ---------- escrita ----------
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray, auto_rebuild: bool = True):
+        """Insere vetores (um por id). Com `auto_rebuild`, compacta/treina quando necessário."""
+        ids = np.asarray(ids, dtype=np.int64)
+        quantized, scales = self._quantize(self._normalize(vectors))
+        if len(ids) != len(quantized):
+            raise ValueError('ids e vetores precisam ter o mesmo tamanho')
+
+        start, stop = self.count, self.count + len(ids)
+        self._grow(stop)
+        self._arrays['vectors'][start:stop] = quantized
+        self._arrays['scales'][start:stop] = scales
+        self._arrays['ids'][start:stop] = ids
+        self._arrays['lists'][start:stop] = -1
+        self._arrays['alive'][start:stop] = 1
+        self.count = stop
+
+        if auto_rebuild and self._needs_rebuild():
+            self.rebuild()
+        else:
+            self._save_meta()
+
+    def remove(self, ids: Sequence[int]) -> int:
+        """Marca como removidos os vetores com esses ids. Retorna quantos foram removidos."""
+        ids = np.asarray(ids, dtype=np.int64)
+        removed = 0
+        for start in range(0, self.count, BLOCK_SIZE):
+            stop = min(start + BLOCK_SIZE, self.count)
+            mask = np.isin(self._arrays['ids'][start:stop], ids) & (self._arrays['alive'][start:stop] == 1)
+            if mask.any():
+                self._arrays['alive'][start:stop][mask] = 0
+                removed += int(mask.sum())
+        return removed
+
+    def _needs_rebuild(self) -> bool:
+        tail = self.count - self.sorted_count
+        if self.centroids is None:
+            return self.count >= MIN_TRAIN_SIZE
+        return tail > REBUILD_TAIL_RATIO * max(self.sorted_count, MIN_TRAIN_SIZE)
+
+    # ---------- treino e compactação ----------
+
+    def _train(self, positions: np.ndarray) -> np.ndarray:
+        """K-means esférico numa amostra dos vetores vivos"""
+        rng = np.random.default_rng(0)
+        n_lists = int(np.clip(np.sqrt(len(positions)), 16, 4096))
+        sample_positions = np.sort(rng.choice(positions, min(len(positions), KMEANS_SAMPLE), replace=False))
+        sample = self._arrays['vectors'][sample_positions].astype(np.float32) * self._arrays['scales'][sample_positions, None]
+        sample = self._normalize(sample)
+
+        # Com poucos vetores vivos (rebuild forçado), não dá para ter mais listas que amostras
+        n_lists = min(n_lists, len(sample))
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = self._normalize(sums)
+        return centroids
+
+    def _assign(self, centroids: np.ndarray, start: int, stop: int):
+        for block in range(start, stop, BLOCK_SIZE):
+            end = min(block + BLOCK_SIZE, stop)
+            self._arrays['lists'][block:end] = np.argmax(self._dequantize(block, end) @ centroids.T, axis=1)
+
+    def rebuild(self, retrain: bool = False):
+        """Reescreve o arquivo agrupado por lista, descartando vetores removidos.
+
+        Treina os centroides na primeira vez (ou quando o índice cresceu muito desde o
+        último treino); fora isso, só atribui a cauda às listas existentes.
+        """
+        alive_positions = np.flatnonzero(self._arrays['alive'][:self.count])
+        if not len(alive_positions) or (len(alive_positions) < MIN_TRAIN_SIZE and not retrain):
+            self._save_meta()
+            return
+
+        if retrain or self.centroids is None or len(alive_positions) > RETRAIN_GROWTH * self.trained_count:
+            self.centroids = self._train(alive_positions)
+            self.trained_count = len(alive_positions)
+            self._assign(self.centroids, 0, self.count)
+        else:
+            self._assign(self.centroids, self.sorted_count, self.count)
+
+        lists = self._arrays['lists'][alive_positions]
+        order = alive_positions[np.argsort(lists, kind='stable')]
+        counts = np.bincount(lists, minlength=len(self.centroids))
+
+        # Copia em blocos para arquivos temporários e troca no final
+        capacity = max(INITIAL_CAPACITY, len(order))
+        new_arrays = self._open_arrays(capacity, suffix='.tmp')
+        for block in range(0, len(order), BLOCK_SIZE):
+            positions = order[block:block + BLOCK_SIZE]
+            for name, array in new_arrays.items():
+                array[block:block + len(positions)] = self._arrays[name][positions]
+        for array in new_arrays.values():
+            array.flush()
+        del new_arrays
+
+        self._arrays = {}
+        for name, _, _ in _COLUMNS:
+            os.replace(self._column_file(name, '.tmp'), self._column_file(name))
+
+        self.count = self.sorted_count = len(order)
+        self.capacity = capacity
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        np.save(self.path / 'centroids.npy', self.centroids)
+        np.save(self.path / 'offsets.npy', self.offsets)
+        self._open_arrays(self.capacity)
+        self._save_meta()
+
+    # ---------- busca ----------
+
+    def _score_range(self, query: np.ndarray, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        positions, scores = [], []
+        for block in range(start, stop, BLOCK_SIZE):
+            end = min(block + BLOCK_SIZE, stop)
+            alive = np.flatnonzero(self._arrays['alive'][block:end])
+            if not len(alive):
+                continue
+            vectors = self._arrays['vectors'][block:end]
+            block_scores = (vectors.astype(np.float32) @ query) * self._arrays['scales'][block:end]
+            positions.append(alive + block)
+            scores.append(block_scores[alive])
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(positions), np.concatenate(scores)
+
+    def search(self, query: np.ndarray, k: int = 10, n_probe: Optional[int] = None) -> list[tuple[int, float]]:
+        """Retorna até `k` pares (id, similaridade coseno aproximada), do mais para o menos similar"""
+        query = self._normalize(query)[0]
+
+        if self.centroids is None or self.offsets is None:
+            ranges = [(0, self.count)]
+        else:
+            n_probe = min(n_probe or self.n_probe, len(self.centroids))
+            probe = np.argpartition(self.centroids @ query, -n_probe)[-n_probe:]
+            ranges = [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in probe]
+            ranges.append((self.sorted_count, self.count))
+
+        scored = [self._score_range(query, start, stop) for start, stop in ranges if stop > start]
+        if not scored:
+            return []
+        positions = np.concatenate([p for p, _ in scored])
+        scores = np.concatenate([s for _, s in scored])
+        if not len(scores):
+            return []
+
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        ids = self._arrays['ids'][positions[top]]
+        return [(int(i), float(s)) for i, s in zip(ids, scores[top])]
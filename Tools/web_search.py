@@ -4,132 +4,341 @@ Ferramenta padrão de exemplo para pesquisas na Internet
 Escrita originalmente por Arthur (Desenvolvedor original)
 """
 
-from .tool_registry import tool
-from ddgs import DDGS, exceptions
+from .tool_registry import tool, ToolRegistry
+from .model_residency import residency
+from .embedding_cache import EmbeddingCache
+from .page_cache import PageFetcher, OFFLOAD_MIN_CHARS
+from .search_store import SearchStore
+from .html_extractor import extract_text
+from .text_chunker import split_chunks, approx_tokens
+from .bm25 import bm25_scores, top_k as bm25_top_k
+from .search_client import SearchClient, RateLimitedError, SearchUnavailableError
+from ddgs import exceptions
 from pathlib import Path
 from config import config
-from typing import Literal, Optional, cast, Any
-from json import dump, dumps
-import lmstudio as lms
+from typing import Callable, Iterable, Literal, Optional, cast, Any
+from itertools import islice
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from json import dumps
 import numpy as np
-import requests
+import threading
+import time
 import re
-import json
 
 
 COUNTRY = config.get('location')
-CACHE_PAGES_PATH = Path(__file__).parent.parent / 'cache' / '_results.json'
+CACHE_DIR = Path(__file__).parent.parent / 'cache'
+# Chunks enviados por requisição de embedding (uma ida ao servidor por lote)
+EMBED_BATCH_SIZE = 64
+# Quantos chunks mais relevantes voltam para o modelo
+TOP_CHUNKS = 3
+# Pré-filtro lexical: quantos chunks (por BM25) chegam a ser embedados, e em que modo
+RERANK_MODE = config.get('advanced.rerank.mode', 'bm25+embedding')
+RERANK_CANDIDATES = config.get('advanced.rerank.candidates', 20)
+# Pré-carregamento dos primeiros resultados logo após uma pesquisa
+PREFETCH_ENABLED = config.get('advanced.prefetch.enabled', True)
+PREFETCH_TOP_N = config.get('advanced.prefetch.top_n', 2)
+PREFETCH_WORKERS = config.get('advanced.prefetch.workers', 2)
+PREFETCH_EMBED = config.get('advanced.prefetch.embed', False)
+# Pesquisa combinada (`pesquisar_tudo`): prazo total e tamanho da lista final
+FANOUT_DEADLINE = config.get('advanced.search_fanout.deadline', 8)
+FANOUT_MAX_RESULTS = config.get('advanced.search_fanout.max_results', 8)
+# Threads por backend no pool da pesquisa combinada: um backend lento segura a thread além do
+# prazo (até o prazo do SearchClient), e a pesquisa seguinte não pode ficar na fila atrás dela
+FANOUT_WORKERS_PER_BACKEND = 3
+RRF_K = 60
+PERIODS = {'todos': None, 'dia': 'd', 'semana': 'w', 'mes': 'm'}
+# Parâmetros de rastreamento ignorados ao comparar URLs
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|ref|ref_src|mc_cid|mc_eid)$', re.IGNORECASE)
+# Quanto `ler_pagina_web` espera por um pré-carregamento em andamento da mesma URL
+PREFETCH_WAIT = 15
+# Leitura de várias páginas (`ler_varias_paginas`): prazo total, orçamento de tokens da resposta e paralelismo
+MULTI_READ_DEADLINE = config.get('advanced.multi_read.deadline', 20)
+MULTI_READ_MAX_TOKENS = config.get('advanced.multi_read.max_tokens', 1500)
+MULTI_READ_MAX_PAGES = 6
+MULTI_READ_WORKERS = 4
+
+def normalize_url(url: str) -> str:
+   """Forma canônica da URL para deduplicar (sem www/m., fragmento, barra final e rastreadores)."""
+   parts = urlsplit(url.strip())
+   host = (parts.hostname or '').lower()
+   host = re.sub(r'^(www\d*|m|mobile)\.', '', host)
+   host = re.sub(r'\.m\.wikipedia\.org$', '.wikipedia.org', host)
+   query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k))
+   path = parts.path.rstrip('/') or '/'
+   return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme, host, path, urlencode(query), ''))
 
 class WebSearchEngine:
    
    def __init__(self, embedding_model: str = config.get('models.embedding')):
       self.model = embedding_model
-      CACHE_PAGES_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-
-   def _save_results(self, results):
-      with open(CACHE_PAGES_PATH, 'w', encoding='utf-8') as res:
-         dump(results, res, indent=4, ensure_ascii=False)
-   
-   def _text_search(self, query: str, date: Optional[str], engine: Literal['google', 'wikipedia']):
+      CACHE_DIR.mkdir(parents=True, exist_ok=True)
+      self.embedding_cache = EmbeddingCache(CACHE_DIR)
+      self.fetcher = PageFetcher()
+      # Uma sessão DDGS longa, com limite de taxa e novas tentativas para falhas passageiras
+      self.ddgs = SearchClient()
+      # Pesquisas anteriores: IDs "s<n>-<i>" e cache por (busca, backend, período)
+      self.results = SearchStore(CACHE_DIR / 'searches.db')
+
+      # Pré-carregamento: cada nova pesquisa incrementa a geração e invalida a anterior
+      self._prefetch_pool: Optional[ThreadPoolExecutor] = None
+      self._prefetch_generation = 0
+      self._prefetching: dict[str, Future] = {}
+      # Texto já limpo das páginas pré-carregadas: URL -> (geração, texto). Nem toda página
+      # fica no cache HTTP (sem validadores nem validade), então a leitura usa isto primeiro
+      self._prefetched: dict[str, tuple[int, str]] = {}
+      self._prefetch_lock = threading.Lock()
+      self._search_pool: Optional[ThreadPoolExecutor] = None
+      self._read_pool: Optional[ThreadPoolExecutor] = None
+      self._pools_lock = threading.Lock()
+
+   def _start_prefetch(self, results: list[dict[str, str]]):
+      """Começa a baixar e limpar (e opcionalmente embedar) os primeiros resultados em segundo plano."""
+      if not PREFETCH_ENABLED or PREFETCH_TOP_N <= 0:
+         return
+
+      with self._prefetch_lock:
+         # Pesquisa nova substitui a anterior: cancela o que ainda nem começou
+         self._prefetch_generation += 1
+         for future in self._prefetching.values():
+            future.cancel()
+         self._prefetching.clear()
+         self._prefetched.clear()
+
+         if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+
+         generation = self._prefetch_generation
+         for item in results[:PREFETCH_TOP_N]:
+            url = item.get('link', '')
+            if url.startswith('http'):
+               self._prefetching[url] = self._prefetch_pool.submit(self._prefetch_page, url, generation)
+
+   def _prefetch_page(self, url: str, generation: int):
+      """Tarefa em segundo plano; desiste se outra pesquisa já tomou o lugar desta."""
+      if generation != self._prefetch_generation:
+         return
       try:
-         with DDGS() as ddgs:
-            results: list[dict[str, str]] = ddgs.text(
-               query=query,
-               region=COUNTRY,
-               max_results=5,
-               timelimit=date,
-               safesearch='moderate',
-               backend=engine
+         clean_content = self.fetcher.fetch(url)
+         with self._prefetch_lock:
+            if generation == self._prefetch_generation:
+               self._prefetched[url] = (generation, clean_content)
+         if PREFETCH_EMBED and generation == self._prefetch_generation:
+            embed_model = residency.embedding(self.model)
+            self.embedding_cache.get_or_embed(
+               self.model, self._split_text_into_chunks(clean_content), lambda batch: self._embed_batched(embed_model, batch)
             )
+      except Exception:
+         # Falhou no fundo: `ler_pagina_web` tenta de novo e mostra o erro se for o caso
+         pass
+
+   def _wait_prefetch(self, url: str):
+      """Se a URL está sendo pré-carregada, espera terminar em vez de baixar duas vezes."""
+      with self._prefetch_lock:
+         future = self._prefetching.get(url)
+      if future is not None:
+         wait([future], timeout=PREFETCH_WAIT)
+
+   def _take_prefetched(self, url: str) -> Optional[str]:
+      """Texto pré-carregado pela pesquisa atual, se houver (de uma pesquisa anterior não vale mais)."""
+      with self._prefetch_lock:
+         generation, text = self._prefetched.get(url, (None, None))
+         return text if generation == self._prefetch_generation else None
+
+
+   def _search_error(self, error: exceptions.DDGSException) -> str:
+      """Mensagem para o modelo que diz se vale reformular, esperar ou desistir da pesquisa."""
+      if isinstance(error, RateLimitedError):
+         return "Erro: a pesquisa está temporariamente limitada (muitas requisições). Reformular não ajuda; espere antes de pesquisar de novo."
+      if isinstance(error, SearchUnavailableError):
+         return "Erro: o serviço de pesquisa não respondeu (timeout ou falha de rede), mesmo após novas tentativas. Tente de novo mais tarde."
+      return "Nenhum resultado encontrado, tente outra pesquisa!"
+
+   def _cached_search(self, query: str, backend: str, date: Optional[str], search: Callable[[], list[dict[str, str]]]) -> list[dict[str, str]]:
+      """Reaproveita a mesma pesquisa feita há pouco; senão roda `search` e registra os resultados com IDs novos."""
+      results = self.results.get(query, backend, date)
+      if results is None:
+         results = self.results.add(query, backend, date, search())
+      return results
+
+   def _ddgs_text(self, query: str, date: Optional[str], engine: Literal['google', 'wikipedia']) -> list[dict[str, str]]:
+      results: list[dict[str, str]] = self.ddgs.search(
+         'text',
+         query=query,
+         region=COUNTRY,
+         max_results=5,
+         timelimit=date,
+         safesearch='moderate',
+         backend=engine
+      )
+
+      for item in results:
+         item['link'] = item.pop('href')
+         item['snippet'] = item.pop('body')
+         if len(item['snippet']) > 700:
+            item['snippet'] = item['snippet'][:700] + "[...]"
+      return results
+
+   def _ddgs_news(self, query: str, date: Optional[str]) -> list[dict[str, str]]:
+      results: list[dict[str, str]] = self.ddgs.search(
+         'news',
+         query=query,
+         region=COUNTRY,
+         safesearch="moderate",
+         timelimit=date,
+         max_results=4
+      )
+
+      for item in results:
+         item['snippet'] = item.pop('body')
+         item['link'] = item.pop('url')
+      return results
 
-         for item in results:
-            item['link'] = item.pop('href')
-            item['snippet'] = item.pop('body')
-            if len(item['snippet']) > 700:
-               item['snippet'] = item['snippet'][:700] + "[...]"
-
-         for i in range(len(results)):
-            results[i]['id'] = str(i)
-
-         self._save_results(results)
+   def _text_search(self, query: str, date: Optional[str], engine: Literal['google', 'wikipedia']):
+      try:
+         results = self._cached_search(query, engine, date, lambda: self._ddgs_text(query, date, engine))
+         self._start_prefetch(results)
 
          for item in results:
             if len(item['link']) > 120:
                item['link'] = item['link'][:120] + "[...]"
 
          return dumps(results, indent=2, ensure_ascii=False)
-      except exceptions.DDGSException:
-         return "Nenhum resultado encontrado, tente outra pesquisa!"
+      except exceptions.DDGSException as e:
+         return self._search_error(e)
 
    def _news_search(self, query: str, date: Optional[str]):
       try:
-         with DDGS() as ddgs:
-            results: list[dict[str, str]] = ddgs.news(
-               query=query,
-               region=COUNTRY,
-               safesearch="moderate",
-               timelimit=date,
-               max_results=4
-            )
+         results = self._cached_search(query, 'news', date, lambda: self._ddgs_news(query, date))
+         self._start_prefetch(results)
 
          for item in results:
-            item['snippet'] = item.pop('body')
-            item['link'] = item.pop('url')
+            if len(item['link']) > 120:
+               item['link'] = item['link'][:120] + "[...]"
 
-         for i in range(len(results)):
-            results[i]['id'] = str(i)
+         return dumps(results, indent=2, ensure_ascii=False)
+
+      except exceptions.DDGSException as e:
+         return self._search_error(e)
 
-         self._save_results(results)
+   def _fanout(self, query: str, date: Optional[str]) -> list[dict[str, str]]:
+      """Consulta os backends em paralelo e junta os resultados (sem repetir URL) por fusão de ranking.
+
+      O que não responder até `FANOUT_DEADLINE` fica de fora; só falha se nenhum backend respondeu.
+      """
+      backends: dict[str, Callable[[], list[dict[str, str]]]] = {
+         'google': lambda: self._ddgs_text(query, date, 'google'),
+         'wikipedia': lambda: self._ddgs_text(query, date, 'wikipedia'),
+         'news': lambda: self._ddgs_news(query, date),
+      }
+      with self._pools_lock:
+         if self._search_pool is None:
+            self._search_pool = ThreadPoolExecutor(
+               max_workers=len(backends) * FANOUT_WORKERS_PER_BACKEND, thread_name_prefix='search'
+            )
+      futures = {self._search_pool.submit(search): name for name, search in backends.items()}
+      done, pending = wait(futures, timeout=FANOUT_DEADLINE)
+      for future in pending:
+         # Backend lento: segue sem ele (a thread termina sozinha no timeout do DDGS)
+         future.cancel()
+
+      # Reciprocal rank fusion: cada aparição soma 1 / (k + posição); URL repetida junta as fontes
+      merged: dict[str, dict[str, Any]] = {}
+      errors = []
+      for future in done:
+         try:
+            results = future.result()
+         except exceptions.DDGSException as e:
+            errors.append(e)
+            continue
+         except Exception as e:
+            # Erro inesperado de um backend (resposta em formato estranho, etc.) não derruba os outros
+            errors.append(SearchUnavailableError(f'{futures[future]}: {e}'))
+            continue
+         for rank, item in enumerate(results):
+            key = normalize_url(item.get('link', ''))
+            entry = merged.setdefault(key, {'item': item, 'score': 0.0, 'sources': []})
+            if not entry['item'].get('snippet') and item.get('snippet'):
+               entry['item'] = item
+            entry['score'] += 1 / (RRF_K + rank)
+            entry['sources'].append(futures[future])
+
+      if not merged:
+         # Se algum backend foi limitado ou caiu, é isso que o modelo precisa saber (não "sem resultados")
+         errors.sort(key=lambda e: not isinstance(e, (RateLimitedError, SearchUnavailableError)))
+         raise errors[0] if errors else SearchUnavailableError('nenhum backend respondeu a tempo')
+
+      ranked = sorted(merged.values(), key=lambda entry: entry['score'], reverse=True)[:FANOUT_MAX_RESULTS]
+      compact = []
+      for entry in ranked:
+         item = entry['item']
+         snippet = item.get('snippet', '')
+         compact.append({
+            'title': item.get('title', ''),
+            'link': item['link'],
+            'snippet': snippet[:300] + "[...]" if len(snippet) > 300 else snippet,
+            'fonte': ', '.join(sorted(set(entry['sources']), key=entry['sources'].index)),
+            **({'date': item['date']} if item.get('date') else {}),
+         })
+      return compact
+
+   def _multi_search(self, query: str, date: Optional[str]):
+      try:
+         results = self._cached_search(query, 'mixed', date, lambda: self._fanout(query, date))
+         self._start_prefetch(results)
 
          for item in results:
             if len(item['link']) > 120:
                item['link'] = item['link'][:120] + "[...]"
 
          return dumps(results, indent=2, ensure_ascii=False)
-
-      except exceptions.DDGSException:
-         return "Nenhum resultado encontrado, tente outra pesquisa!"
+      except exceptions.DDGSException as e:
+         return self._search_error(e)
+      except Exception as e:
+         return self._search_error(SearchUnavailableError(str(e)))
 
    def _image_search(self, query: str, date: Optional[str]):
-      try:
-         with DDGS() as ddgs:
-            results: list[dict[str, str]] = ddgs.images(
-               query=query,
-               region=COUNTRY,
-               safesearch="moderate",
-               color="color",
-               max_results=5,
-               timelimit=date,
-            )
+      def search() -> list[dict[str, str]]:
+         results: list[dict[str, str]] = self.ddgs.search(
+            'images',
+            query=query,
+            region=COUNTRY,
+            safesearch="moderate",
+            color="color",
+            max_results=5,
+            timelimit=date,
+         )
 
          for item in results:
             item.pop('source', None)
             item.pop('thumbnail', None)
             item.pop('url', None)
             item['link'] = item.pop('image')
+         return results
 
-         self._save_results(results)
+      try:
+         results = self._cached_search(query, 'images', date, search)
 
          for item in results:
             if len(item['link']) > 120:
                item['link'] = item['link'][:120] + "[...]"
 
          return dumps(results, indent=2, ensure_ascii=False)
-      except exceptions.DDGSException:
-         return "Nenhum resultado encontrado, tente outra pesquisa!"
+      except exceptions.DDGSException as e:
+         return self._search_error(e)
 
 
    def _video_search(self, query: str, date: Optional[str]):
-      try:
-         with DDGS() as ddgs:
-            results: list[dict[str, str]] = ddgs.videos(
-               query=query,
-               region=COUNTRY,
-               safesearch="moderate",
-               timelimit=date,
-               max_results=5
-            )
+      def search() -> list[dict[str, str]]:
+         results: list[dict[str, str]] = self.ddgs.search(
+            'videos',
+            query=query,
+            region=COUNTRY,
+            safesearch="moderate",
+            timelimit=date,
+            max_results=5
+         )
 
          for item in results:
             item['link'] = item.pop('content')
@@ -146,175 +355,120 @@ class WebSearchEngine:
 
             stats = cast(dict[str, Any], item.pop('statistics', {}))
             item['views'] = stats.get('viewCount', '')
+         return results
 
-         for i in range(len(results)):
-            results[i]['id'] = str(i)
-
-         self._save_results(results)
+      try:
+         results = self._cached_search(query, 'videos', date, search)
 
          return dumps(results, indent=2, ensure_ascii=False)
 
-      except exceptions.DDGSException:
-         return "Nenhum resultado encontrado, tente outra pesquisa!"
+      except exceptions.DDGSException as e:
+         return self._search_error(e)
 
    def _clean_html_content(self, html_content: str) -> str:
         """
-        Removes useless HTML tags and their contents using regex.
+        Extracts the main article text from the HTML in a single parsing pass.
         """
-        # Remove scripts, styles, head, comments, etc.
-        patterns_to_remove = [
-            r'<script[^>]*>.*?</script>',
-            r'<style[^>]*>.*?</style>',
-            r'<head[^>]*>.*?</head>',
-            r'<meta[^>]*>',
-            r'<link[^>]*>',
-            r'<img[^>]*>',
-            r'<svg[^>]*>.*?</svg>',
-            r'<iframe[^>]*>.*?</iframe>',
-            r'<video[^>]*>.*?</video>',
-            r'<audio[^>]*>.*?</audio>',
-            r'<nav[^>]*>.*?</nav>',
-            r'<footer[^>]*>.*?</footer>',
-            r'<header[^>]*>.*?</header>',
-            r'<aside[^>]*>.*?</aside>',
-            r'<!--.*?-->',
-            r'<noscript[^>]*>.*?</noscript>',
-        ]
-        
-        cleaned_content = html_content
-        for pattern in patterns_to_remove:
-            cleaned_content = re.sub(pattern, '', cleaned_content, flags=re.DOTALL | re.IGNORECASE)
-
-        # Remove todas as tags HTML restantes
-        cleaned_content = re.sub(r'<[^>]+>', '', cleaned_content)
-
-        # Remove múltiplos espaços, quebras de linha e caracteres especiais
-        cleaned_content = re.sub(r'\s+', ' ', cleaned_content)
-        cleaned_content = re.sub(r'&[a-zA-Z]+;', '', cleaned_content)  # Remove entidades HTML
-
-        return cleaned_content.strip()
-
-   def _split_text_into_chunks(self, text: str, max_chunk_size: int = 500) -> list[str]:
+        # Pula script/style/nav/etc., decodifica entidades e mantém só o bloco com mais densidade de texto
+        return extract_text(html_content)
+
+   def _split_text_into_chunks(self, text: str) -> list[str]:
         """
-        Splits long text into smaller chunks for embedding processing.
+        Splits long text into overlapping, sentence-aligned chunks sized for the embedding model.
         """
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for word in words:
-            if current_size + len(word) + 1 > max_chunk_size and current_chunk:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_size = len(word)
-            else:
-                current_chunk.append(word)
-                current_size += len(word) + 1
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
+        # O gerador não guarda a lista de palavras; só os chunks, que voltam para o modelo no fim.
+        # Texto grande é dividido num worker, para não travar o streaming da resposta
+        if len(text) >= OFFLOAD_MIN_CHARS:
+            return ToolRegistry.run_in_worker(split_chunks, text)
+        return split_chunks(text)
 
    def _extract_relevant_content_with_embeddings(self, search_text: str, text_chunks: list[str]) -> str:
         """
         Uses embeddings to find the most relevant chunks of text for the search query.
         """
         try:
-            embedding_client = lms.Client('localhost:1234')
-            
-            # ---
-            loaded_models = []
-            for model in embedding_client.list_loaded_models():
-                loaded_models.append(
-                    {
-                        'type': 'llm' if isinstance(model, lms.LLM) else 'embedding',
-                        'default_identifier': model.identifier
-                    }
-                )
-            
-            unloaded_models = []
-            # Se o modelo a ser usado não estiver carregado
-            if self.model not in (loaded_model['default_identifier'] for loaded_model in loaded_models):
-                try:
-                    # Tenta iniciar uma nova instância do modelo a ser usado
-                    embed_model = embedding_client.embedding.load_new_instance(self.model)
-                # Se não tiver memória o suficiente
-                except lms.LMStudioServerError:
-                    
-                    # Descarrega os modelos
-                    for model in loaded_models:
-                        if model['default_identifier'] == 'llm':
-                            embedding_client.llm.unload(model['default_identifier'])
-                            unloaded_models.append(model)
-                    embed_model = embedding_client.embedding.model(self.model)
-            else:
-                embed_model = embedding_client.embedding.model(self.model)
-            # ---
-
-            # Gera embedding para o texto de busca
-            search_embedding = embed_model.embed(search_text)
-
-            # Gera embeddings para todos os chunks
-            chunk_embeddings = []
-            for chunk in text_chunks:
-                chunk_embedding = embed_model.embed(chunk)
-                chunk_embeddings.append(chunk_embedding)
-            
-            # Calcula similaridade coseno entre o texto de busca e cada chunk
-            similarities = []
-            for chunk_embedding in chunk_embeddings:
-                similarity = self._cosine_similarity(search_embedding, chunk_embedding) #type:ignore
-                similarities.append(similarity)
-            
-            # Ordena chunks por similaridade (maior similaridade primeiro)
-            chunk_similarity_pairs = list(zip(text_chunks, similarities))
-            chunk_similarity_pairs.sort(key=lambda x: x[1], reverse=True)
-            
-            # Retorna os 3 chunks mais relevantes
-            top_chunks = chunk_similarity_pairs[:3]
-            relevant_content = '\n\n---\n\n'.join([chunk for chunk, _ in top_chunks])
-            
-            embed_model.unload()
-            
-            # Recarrega modelos descarregados para prevenir problemas
-            for model in unloaded_models:
-                if model['type'] == 'llm':
-                    embedding_client.llm.load_new_instance(model['default_identifier'])
-                else:
-                    embedding_client.embedding.load_new_instance(model['default_identifier'])
+            top_chunks = self._select_chunks(search_text, text_chunks)
+            relevant_content = '\n\n---\n\n'.join(text_chunks[i] for i in top_chunks)
             
             return relevant_content
             
         except Exception as e:
             return f'Erro ao processar embeddings: {str(e)}'
 
-   def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """
-        Calcula a similaridade coseno entre dois vetores
-        """
-        # Normaliza os vetores
-        vec1_norm = vec1 / np.linalg.norm(vec1)
-        vec2_norm = vec2 / np.linalg.norm(vec2)
-        
-        # Calcula o produto escalar (similaridade coseno)
-        similarity = np.dot(vec1_norm, vec2_norm)
-        
-        return float(similarity)
+   def _select_chunks(
+      self,
+      search_text: str,
+      text_chunks: list[str],
+      k: int = TOP_CHUNKS,
+      mode: str = RERANK_MODE,
+      candidates: int = RERANK_CANDIDATES,
+      min_hits: int = TOP_CHUNKS,
+   ) -> list[int]:
+      """Índices dos `k` chunks mais relevantes para a busca, do mais para o menos relevante.
+
+      Modos (config `advanced.rerank.mode`):
+         `bm25+embedding`: BM25 escolhe até `candidates` chunks e só eles passam pelos embeddings
+            (se menos de `min_hits` chunks tiverem alguma palavra da busca, embeda todos);
+         `embedding`: embeda todos os chunks;
+         `bm25`: só a pontuação lexical, sem nenhuma chamada de embedding.
+      """
+      if not text_chunks:
+         return []
+
+      pool = list(range(len(text_chunks)))
+      if mode != 'embedding' and (mode == 'bm25' or len(text_chunks) > candidates):
+         if sum(map(len, text_chunks)) >= OFFLOAD_MIN_CHARS:
+            lexical = ToolRegistry.run_in_worker(bm25_scores, search_text, text_chunks)
+         else:
+            lexical = bm25_scores(search_text, text_chunks)
+         if mode == 'bm25':
+            return bm25_top_k(lexical, k)
+         # Sem palavras em comum suficientes, o filtro lexical seria chute: embeda tudo
+         if np.count_nonzero(lexical) >= min_hits:
+            pool = sorted(bm25_top_k(lexical, candidates))
+
+      # Modelo fica residente entre chamadas; o gerenciador só descarrega outros se faltar memória
+      embed_model = residency.embedding(self.model)
+
+      # Gera embedding para o texto de busca e, em lotes, para os chunks que não estão no cache
+      search_embedding = np.asarray(embed_model.embed(search_text), dtype=np.float32)
+      chunk_embeddings = self.embedding_cache.get_or_embed(
+         self.model, [text_chunks[i] for i in pool], lambda batch: self._embed_batched(embed_model, batch)
+      )
+
+      # Ordena os candidatos por similaridade coseno
+      return [pool[i] for i in self._rank_chunks(search_embedding, chunk_embeddings, k)]
+
+   def _embed_batched(self, embed_model, texts: Iterable[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+      """Gera os embeddings em lotes, retornando uma matriz (len(texts), dim).
+
+      Aceita qualquer iterável (ex.: direto do `iter_chunks`), consumido um lote por vez.
+      """
+      vectors = []
+      iterator = iter(texts)
+      while batch := list(islice(iterator, batch_size)):
+         vectors.extend(embed_model.embed(batch))
+      return np.asarray(vectors, dtype=np.float32)
+
+   def _rank_chunks(self, query: np.ndarray, matrix: np.ndarray, k: int) -> list[int]:
+      """Índices das `k` linhas mais similares (coseno) à consulta, da maior para a menor."""
+      if not len(matrix):
+         return []
+
+      # Normaliza tudo e calcula todas as similaridades num único produto matriz-vetor
+      query = query / max(float(np.linalg.norm(query)), 1e-12)
+      matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+      similarities = matrix @ query
+
+      k = min(k, len(similarities))
+      top = np.argpartition(similarities, -k)[-k:]
+      return top[np.argsort(similarities[top])[::-1]].tolist()
 
    def _resolve_target(self, target: str) -> str | None:
       """Retorna a URL baseada no input (seja ID ou URL direta)."""
-      # Caso 1: É um ID numérico (ex: "0", "1")
-      if target.isdigit():
-         try:
-            with open(CACHE_PAGES_PATH, 'r', encoding='utf-8') as f:
-                  cache = json.load(f)
-            for item in cache:
-                  if item.get('id') == target:
-                     return item.get('link')
-         except Exception:
-            return None
+      # Caso 1: É um ID de pesquisa (ex: "s3-1", ou só "1" para a pesquisa mais recente)
+      if link := self.results.resolve(target):
+         return link
       
       # Caso 2: É uma URL direta
       if target.startswith('http'):
@@ -341,6 +495,21 @@ class WebSearchEngine:
       """
       return self._text_search(query=busca, date=periodo, engine='google')
 
+   @tool
+   def pesquisar_tudo(
+      self,
+      busca: str,
+      periodo: Literal['todos', 'dia', 'semana', 'mes'] = 'todos'
+   ) -> str:
+      """Pesquisa ao mesmo tempo no Google, na Wikipédia e nas notícias e junta tudo numa lista só.
+      Use quando uma pesquisa simples não bastar ou o tema pedir várias fontes.
+
+      Args:
+         busca: Termo ou palavra a ser buscada.
+         periodo: Tempo limite do resultado (`todos`, `dia`, `semana` ou `mes`). Padroniza para `todos`.
+      """
+      return self._multi_search(query=busca, date=PERIODS.get(periodo))
+
    @tool
    def pesquisar_imagens(self, busca: str) -> str:
       """Pesquisa imagens na web. Retorna links e descrições."""
@@ -361,7 +530,7 @@ class WebSearchEngine:
       """Lê conteúdo de uma página web (via URL ou ID de pesquisa).
       
       Args:
-         alvo: URL completa (https://...) OU o ID numérico de uma pesquisa anterior (ex: '0').
+         alvo: URL completa (https://...) OU o ID de um resultado de pesquisa anterior (ex: 's3-0').
          busca: Tópico específico para extrair via IA (Embeddings).
       """
       url = self._resolve_target(alvo)
@@ -369,12 +538,99 @@ class WebSearchEngine:
          return "Erro: URL inválida ou ID não encontrado."
 
       try:
-         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-         response = requests.get(url, headers=headers, timeout=10)
-         response.raise_for_status()
-         clean_content = self._clean_html_content(response.text)
+         clean_content = self._fetch_for_read(url)
       except Exception as e:
          return f'Erro ao acessar {url}: {str(e)}'
 
       chunks = self._split_text_into_chunks(clean_content)
-      return self._extract_relevant_content_with_embeddings(busca, chunks)
\ No newline at end of file
+      return self._extract_relevant_content_with_embeddings(busca, chunks)
+
+   def _fetch_for_read(self, url: str) -> str:
+      """Texto limpo da página: do pré-carregamento (esperando o que estiver em andamento) ou baixado agora."""
+      self._wait_prefetch(url)
+      if (text := self._take_prefetched(url)) is not None:
+         return text
+      # Download em streaming (com limite de bytes) + cache HTTP; em acerto de cache a limpeza do HTML nem roda
+      return self.fetcher.fetch(url)
+
+   @tool
+   def ler_varias_paginas(self, alvos: list[str], busca: str) -> str:
+      """Lê várias páginas de uma vez e devolve os trechos mais relevantes de todas, com a fonte de cada um.
+      Para comparar fontes, prefira esta ferramenta a várias chamadas de `ler_pagina_web`.
+
+      Args:
+         alvos: Lista de URLs (https://...) e/ou IDs de resultados de pesquisa (ex: ['s3-0', 's3-2']).
+         busca: Tópico específico para extrair via IA (Embeddings).
+      """
+      start = time.monotonic()
+      # Um prazo só para tudo: o que sobrar depois dos downloads é o tempo dos embeddings
+      deadline = start + MULTI_READ_DEADLINE
+      sources: list[str] = []
+      problems: list[str] = []
+      for alvo in alvos[:MULTI_READ_MAX_PAGES]:
+         url = self._resolve_target(alvo)
+         if not url:
+            problems.append(f'{alvo}: URL inválida ou ID não encontrado')
+         elif url not in sources:
+            sources.append(url)
+      if not sources:
+         return 'Erro: nenhuma URL válida.' + (f' ({"; ".join(problems)})' if problems else '')
+
+      with self._pools_lock:
+         if self._read_pool is None:
+            self._read_pool = ThreadPoolExecutor(max_workers=MULTI_READ_WORKERS, thread_name_prefix='read')
+      futures = {self._read_pool.submit(self._fetch_for_read, url): number for number, url in enumerate(sources, 1)}
+      done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+      for future in pending:
+         # A página lenta fica de fora; se terminar depois, ao menos fica no cache HTTP
+         future.cancel()
+         problems.append(f'[{futures[future]}] tempo esgotado')
+
+      # Junta os chunks de todas as páginas, lembrando de qual fonte veio cada um
+      chunks: list[str] = []
+      origin: list[int] = []
+      for future in sorted(done, key=futures.__getitem__):
+         number = futures[future]
+         try:
+            page_chunks = self._split_text_into_chunks(future.result())
+         except Exception as e:
+            problems.append(f'[{number}] {e}')
+            continue
+         chunks.extend(page_chunks)
+         origin.extend([number] * len(page_chunks))
+
+      lines = [f'[{number}] {url}' for number, url in enumerate(sources, 1)]
+      if not chunks:
+         if problems:
+            lines.append('Falhas: ' + '; '.join(problems))
+         return '\n'.join(lines) + '\n\nNenhum conteúdo pôde ser lido.'
+
+      # Ranking global num único passe de embeddings (ordena todos os candidatos; o orçamento de
+      # tokens corta depois). Se o prazo acabar antes, fica só com a ordem do BM25
+      ranked = None
+      if (remaining := deadline - time.monotonic()) > 0:
+         ranking = self._read_pool.submit(
+            self._select_chunks, busca, chunks, len(chunks), RERANK_MODE, RERANK_CANDIDATES * len(sources)
+         )
+         try:
+            ranked = ranking.result(timeout=remaining)
+         except TimeoutError:
+            # O passe continua no fundo e deixa os embeddings no cache para a próxima leitura
+            problems.append('embeddings: tempo esgotado, trechos ordenados só por palavras')
+         except Exception as e:
+            return f'Erro ao processar embeddings: {str(e)}'
+      if ranked is None:
+         ranked = self._select_chunks(busca, chunks, k=len(chunks), mode='bm25')
+      if problems:
+         lines.append('Falhas: ' + '; '.join(problems))
+
+      parts, used = [], 0
+      for i in ranked:
+         tokens = approx_tokens(chunks[i])
+         if parts and used + tokens > MULTI_READ_MAX_TOKENS:
+            break
+         parts.append(f'[{origin[i]}] {chunks[i]}')
+         used += tokens
+
+      lines.append(f'({len(parts)} trechos, {time.monotonic() - start:.1f}s)')
+      return '\n'.join(lines) + '\n\n---\n\n' + '\n\n---\n\n'.join(parts)
\ No newline at end of file
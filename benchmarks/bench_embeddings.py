@@ -0,0 +1,80 @@
+"""
+Benchmark do ranking por embeddings do `ler_pagina_web`: chamada por chunk x em lotes
+
+Baixa uma página longa da Wikipédia, limpa e divide em chunks como a ferramenta faz,
+e compara o caminho antigo (um `embed` por chunk + coseno par a par) com o atual
+(`embed` em lotes + um único produto matriz-vetor com argpartition).
+
+Precisa do LM Studio rodando com o modelo de embedding configurado.
+
+Uso:
+    python benchmarks/bench_embeddings.py --url https://pt.wikipedia.org/wiki/Brasil --busca "economia"
+"""
+
+from pathlib import Path
+import numpy as np
+import argparse
+import requests
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.web_search import WebSearchEngine, TOP_CHUNKS, EMBED_BATCH_SIZE
+from Tools import residency
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+
+def rank_one_by_one(embed_model, search_text: str, chunks: list[str]) -> list[int]:
+    """Caminho antigo: uma requisição por chunk e similaridade calculada em Python"""
+    search_embedding = np.asarray(embed_model.embed(search_text))
+    similarities = []
+    for chunk in chunks:
+        vector = np.asarray(embed_model.embed(chunk))
+        similarities.append(float(np.dot(search_embedding / np.linalg.norm(search_embedding), vector / np.linalg.norm(vector))))
+    order = sorted(range(len(chunks)), key=lambda i: similarities[i], reverse=True)
+    return order[:TOP_CHUNKS]
+
+
+def rank_batched(engine: WebSearchEngine, embed_model, search_text: str, chunks: list[str]) -> list[int]:
+    search_embedding = np.asarray(embed_model.embed(search_text), dtype=np.float32)
+    return engine._rank_chunks(search_embedding, engine._embed_batched(embed_model, chunks), TOP_CHUNKS)
+
+
+def timed(fn, repeat: int) -> tuple[float, list[int]]:
+    best, result = float('inf'), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='https://pt.wikipedia.org/wiki/Brasil')
+    parser.add_argument('--busca', default='economia e principais exportações')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = WebSearchEngine()
+    response = requests.get(args.url, headers=HEADERS, timeout=30)
+    response.raise_for_status()
+    chunks = engine._split_text_into_chunks(engine._clean_html_content(response.text))
+    print(f'{args.url}: {len(response.text):,} bytes de HTML -> {len(chunks)} chunks')
+
+    embed_model = residency.embedding(engine.model)
+    embed_model.embed('aquecimento')
+
+    old_time, old_top = timed(lambda: rank_one_by_one(embed_model, args.busca, chunks), args.repeat)
+    new_time, new_top = timed(lambda: rank_batched(engine, embed_model, args.busca, chunks), args.repeat)
+
+    batches = -(-len(chunks) // EMBED_BATCH_SIZE)
+    print(f'um por chunk: {old_time:.2f}s ({len(chunks) + 1} requisições)')
+    print(f'em lotes:     {new_time:.2f}s ({batches + 1} requisições)')
+    print(f'speedup:      {old_time / new_time:.1f}x')
+    print(f'mesmo top-{TOP_CHUNKS}: {old_top == new_top} ({old_top} x {new_top})')
+
+
+if __name__ == '__main__':
+    main()
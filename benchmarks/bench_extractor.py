@@ -0,0 +1,201 @@
+"""
+Benchmark do extrator de texto: pipeline antigo de regex x `html_extractor` em uma passada
+
+Roda os dois sobre um corpus de páginas salvas e compara velocidade e qualidade da saída.
+O corpus pode ser:
+- um diretório com arquivos .html (se existir um .txt de mesmo nome com o texto "ouro"
+  do artigo, mede precisão/recall/F1 de palavras contra ele);
+- por padrão, os corpos já guardados pelo cache HTTP (cache/http/*.body.z).
+Além do corpus, sempre entram alguns casos fixos com texto ouro (ex.: página ASP.NET com o
+corpo todo dentro de um <form>), que já zeraram a saída do extrator.
+
+Também mede páginas patológicas sintéticas: `<script>` sem fechamento (os `re.sub` com
+DOTALL reescaneiam o resto do documento a cada ocorrência), milhares de `<div>` aninhados
+sem fechar e tags de fechamento soltas, que não casam com nada (o extrator precisa
+continuar linear nesses dois casos).
+
+Uso:
+    python benchmarks/bench_extractor.py --corpus paginas_salvas/ --repeat 5
+"""
+
+from collections import Counter
+from pathlib import Path
+import argparse
+import time
+import zlib
+import sys
+import re
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.html_extractor import extract_text
+
+DEFAULT_CORPUS = Path(__file__).parent.parent / 'cache' / 'http'
+
+
+def regex_clean(html_content: str) -> str:
+    """O `_clean_html_content` antigo: 16 `re.sub` com DOTALL + tags, espaços e entidades"""
+    patterns_to_remove = [
+        r'<script[^>]*>.*?</script>',
+        r'<style[^>]*>.*?</style>',
+        r'<head[^>]*>.*?</head>',
+        r'<meta[^>]*>',
+        r'<link[^>]*>',
+        r'<img[^>]*>',
+        r'<svg[^>]*>.*?</svg>',
+        r'<iframe[^>]*>.*?</iframe>',
+        r'<video[^>]*>.*?</video>',
+        r'<audio[^>]*>.*?</audio>',
+        r'<nav[^>]*>.*?</nav>',
+        r'<footer[^>]*>.*?</footer>',
+        r'<header[^>]*>.*?</header>',
+        r'<aside[^>]*>.*?</aside>',
+        r'<!--.*?-->',
+        r'<noscript[^>]*>.*?</noscript>',
+    ]
+    cleaned_content = html_content
+    for pattern in patterns_to_remove:
+        cleaned_content = re.sub(pattern, '', cleaned_content, flags=re.DOTALL | re.IGNORECASE)
+    cleaned_content = re.sub(r'<[^>]+>', '', cleaned_content)
+    cleaned_content = re.sub(r'\s+', ' ', cleaned_content)
+    cleaned_content = re.sub(r'&[a-zA-Z]+;', '', cleaned_content)
+    return cleaned_content.strip()
+
+
+def load_corpus(directory: Path) -> list[tuple[str, str, str | None]]:
+    """(nome, html, texto ouro ou None) para cada página do diretório"""
+    pages = []
+    for path in sorted(directory.glob('*.html')):
+        gold = path.with_suffix('.txt')
+        pages.append((path.name, path.read_text(encoding='utf-8', errors='replace'),
+                      gold.read_text(encoding='utf-8') if gold.exists() else None))
+    for path in sorted(directory.glob('*.body.z')):
+        pages.append((path.name, zlib.decompress(path.read_bytes()).decode('utf-8', errors='replace'), None))
+    return pages
+
+
+ARTICLE_TEXT = (
+    'O conselho municipal aprovou nesta terça-feira o novo plano de mobilidade, que prevê corredores '
+    'exclusivos de ônibus, ciclovias ligando os bairros da zona norte ao centro e a reforma de doze '
+    'terminais. A primeira fase começa em março, com orçamento de 40 milhões de reais.'
+)
+
+# (nome, html, texto ouro): regressões conhecidas do extrator
+FIXED_CASES = [
+    (
+        'fixo: ASP.NET (corpo dentro de <form>)',
+        '<html><body><form method="post" action="./noticia.aspx" id="aspnetForm">'
+        '<input type="hidden" name="__VIEWSTATE" value="dDwtMTA4NzM">'
+        '<div id="menu"><a href="/">Início</a> <a href="/noticias">Notícias</a></div>'
+        f'<div id="conteudo"><h1>Plano de mobilidade aprovado</h1><p>{ARTICLE_TEXT}</p><p>{ARTICLE_TEXT}</p></div>'
+        '<select name="ano"><option>2023</option><option>2024</option></select>'
+        '<input type="submit" value="Buscar"><button>Enviar</button>'
+        '</form></body></html>',
+        f'Plano de mobilidade aprovado {ARTICLE_TEXT} {ARTICLE_TEXT}',
+    ),
+    (
+        'fixo: <header> dentro de <article>',
+        '<html><body><header><a href="/">Jornal da Cidade</a> <span>Assine já</span></header>'
+        '<article><header><h1>Plano de mobilidade aprovado</h1><p>Obras começam em março</p></header>'
+        f'<p>{ARTICLE_TEXT}</p><p>{ARTICLE_TEXT}</p></article></body></html>',
+        f'Plano de mobilidade aprovado Obras começam em março {ARTICLE_TEXT} {ARTICLE_TEXT}',
+    ),
+]
+
+
+def unclosed_script_page(repeats: int) -> str:
+    """Aberturas sem fechamento: cada `<script` faz o regex varrer o documento inteiro"""
+    return '<html><body>' + '<p>texto <script x=1> e mais texto</p>\n' * repeats + '</body></html>'
+
+
+def deep_nesting_page(repeats: int) -> str:
+    """`<div>` que nunca fecham: a árvore de blocos fica com `repeats` níveis de profundidade"""
+    return '<html><body>' + '<div><p>Um parágrafo de texto, com vírgulas, dentro de mais um nível.</p>\n' * repeats + '</body></html>'
+
+
+def stray_end_tags_page(repeats: int) -> str:
+    """`<span>` sem fechamento e `</i>` sem abertura: cada fechamento solto não casa com nada na pilha"""
+    return '<html><body><p>' + '<span>texto </i>\n' * repeats + '</p></body></html>'
+
+
+PATHOLOGICAL = {
+    '<script> sem fechamento': unclosed_script_page,
+    '<div> aninhados sem fechamento': deep_nesting_page,
+    'tags de fechamento soltas': stray_end_tags_page,
+}
+
+
+def words(text: str) -> Counter:
+    return Counter(re.findall(r'\w+', text.lower()))
+
+
+def word_f1(output: str, gold: str) -> tuple[float, float, float]:
+    found, expected = words(output), words(gold)
+    overlap = sum((found & expected).values())
+    precision = overlap / max(sum(found.values()), 1)
+    recall = overlap / max(sum(expected.values()), 1)
+    return precision, recall, 2 * precision * recall / max(precision + recall, 1e-12)
+
+
+def leftovers(text: str) -> int:
+    """Restos de marcação na saída: entidades não decodificadas e pedaços de tag"""
+    return len(re.findall(r'&#?\w+;|</?[a-zA-Z][^>]*>', text))
+
+
+def timed(fn, html: str, repeat: int) -> tuple[float, str]:
+    best, output = float('inf'), ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pathological', type=int, nargs='+', default=[1_000, 4_000, 16_000])
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus.exists() else []
+    if not pages:
+        print(f'nenhuma página em {args.corpus}; rodando só os casos fixos e os patológicos')
+    pages += FIXED_CASES
+
+    totals = {'regex': [0.0, 0, 0], 'parser': [0.0, 0, 0]}
+    scores: dict[str, list[tuple[float, float, float]]] = {'regex': [], 'parser': []}
+    size = 0
+    for name, html, gold in pages:
+        size += len(html)
+        line = [f'{name[:40]:<40} {len(html) / 1024:>7.0f} KB']
+        for label, fn in (('regex', regex_clean), ('parser', extract_text)):
+            elapsed, output = timed(fn, html, args.repeat)
+            totals[label][0] += elapsed
+            totals[label][1] += len(output)
+            totals[label][2] += leftovers(output)
+            line.append(f'{label} {elapsed * 1000:>7.1f} ms {len(output):>7} chars')
+            if gold is not None:
+                scores[label].append(word_f1(output, gold))
+        print(' | '.join(line))
+
+    if pages:
+        print(f'\n{len(pages)} páginas, {size / 2**20:.1f} MB de HTML')
+        for label, (elapsed, chars, junk) in totals.items():
+            print(f'{label:>6}: {elapsed:.2f}s ({size / 2**20 / max(elapsed, 1e-9):.1f} MB/s) | '
+                  f'{chars:,} chars de saída | {junk} restos de marcação')
+            if scores[label]:
+                precision, recall, f1 = (sum(column) / len(scores[label]) for column in zip(*scores[label]))
+                print(f'        contra o texto ouro ({len(scores[label])} páginas): '
+                      f'precisão {precision:.3f} | recall {recall:.3f} | F1 {f1:.3f}')
+
+    for name, make_page in PATHOLOGICAL.items():
+        print(f'\ncaso patológico ({name}):')
+        for repeats in args.pathological:
+            html = make_page(repeats)
+            regex_time, _ = timed(regex_clean, html, 1)
+            parser_time, _ = timed(extract_text, html, 1)
+            print(f'{len(html) / 1024:>8.0f} KB | regex {regex_time * 1000:>9.1f} ms | parser {parser_time * 1000:>7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
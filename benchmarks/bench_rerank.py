@@ -0,0 +1,87 @@
+"""
+Benchmark do pré-filtro BM25: chunks embedados x qualidade do top-3
+
+Baixa e divide uma página longa como o `ler_pagina_web` faz, embeda todos os chunks uma vez
+(a referência, modo `embedding`) e compara com o BM25 escolhendo só M candidatos para o
+re-ranqueamento por embedding (modo `bm25+embedding`) e com o BM25 puro (modo `bm25`).
+Como os vetores dos candidatos são os mesmos da referência, a diferença de qualidade vem só
+do filtro; o custo é estimado pelo tempo médio de embedding por chunk medido na referência.
+
+Precisa do LM Studio rodando com o modelo de embedding configurado.
+
+Uso:
+    python benchmarks/bench_rerank.py --url https://pt.wikipedia.org/wiki/Brasil --candidatos 10 20 40
+"""
+
+from pathlib import Path
+import numpy as np
+import argparse
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.web_search import WebSearchEngine, TOP_CHUNKS
+from Tools.bm25 import bm25_scores, top_k
+from Tools import residency
+
+DEFAULT_QUERIES = [
+    'economia e principais exportações',
+    'clima e vegetação',
+    'população e idiomas falados',
+    'história da independência',
+    'sistema político e constituição',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='https://pt.wikipedia.org/wiki/Brasil')
+    parser.add_argument('--buscas', nargs='+', default=DEFAULT_QUERIES)
+    parser.add_argument('--candidatos', type=int, nargs='+', default=[10, 20, 40])
+    args = parser.parse_args()
+
+    engine = WebSearchEngine()
+    chunks = engine._split_text_into_chunks(engine.fetcher.fetch(args.url))
+    print(f'{args.url}: {len(chunks)} chunks')
+
+    embed_model = residency.embedding(engine.model)
+    embed_model.embed('aquecimento')
+    start = time.perf_counter()
+    matrix = engine._embed_batched(embed_model, chunks)
+    per_chunk = (time.perf_counter() - start) / len(chunks)
+    print(f'embedding de referência: {per_chunk * len(chunks):.2f}s ({per_chunk * 1000:.1f} ms/chunk)\n')
+
+    rows: dict[str, list[tuple[int, float, float, float, bool]]] = {}
+    for query in args.buscas:
+        query_vector = np.asarray(embed_model.embed(query), dtype=np.float32)
+        reference = engine._rank_chunks(query_vector, matrix, TOP_CHUNKS)
+
+        start = time.perf_counter()
+        lexical = bm25_scores(query, chunks)
+        bm25_time = time.perf_counter() - start
+
+        variants = {'embedding': list(range(len(chunks)))}
+        for m in args.candidatos:
+            variants[f'bm25+embedding M={m}'] = sorted(top_k(lexical, m))
+
+        for label, pool in variants.items():
+            found = [pool[i] for i in engine._rank_chunks(query_vector, matrix[pool], TOP_CHUNKS)]
+            filter_time = bm25_time if label != 'embedding' else 0.0
+            rows.setdefault(label, []).append((
+                len(pool), len(pool) * per_chunk + filter_time, filter_time,
+                len(set(found) & set(reference)) / TOP_CHUNKS, found[:1] == reference[:1]
+            ))
+
+        found = top_k(lexical, TOP_CHUNKS)
+        rows.setdefault('bm25', []).append(
+            (0, bm25_time, bm25_time, len(set(found) & set(reference)) / TOP_CHUNKS, found[:1] == reference[:1])
+        )
+
+    print(f'{"modo":<24} {"embedados":>9} {"custo est.":>10} {"bm25 ms":>8} {"top-3 igual":>11} {"top-1 igual":>11}')
+    for label, results in rows.items():
+        embedded, cost, bm25_time, overlap, top1 = (sum(column) / len(results) for column in zip(*results))
+        print(f'{label:<24} {embedded:>9.0f} {cost:>9.2f}s {bm25_time * 1000:>8.1f} {overlap:>11.0%} {top1:>11.0%}')
+
+
+if __name__ == '__main__':
+    main()
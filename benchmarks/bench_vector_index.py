@@ -0,0 +1,129 @@
+"""
+Benchmark do VectorIndex: recall x latência x memória residente
+
+Gera embeddings sintéticos agrupados (mistura de gaussianas), monta o índice IVF+int8
+num diretório temporário e compara com a busca exata em float32.
+
+Uso:
+    python benchmarks/bench_vector_index.py --sizes 100000 1000000 5000000 --dim 768
+"""
+
+from pathlib import Path
+import numpy as np
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.vector_index import VectorIndex
+
+GENERATION_BLOCK = 100_000
+
+
+def resident_memory_mb() -> tuple[float, float]:
+    """(RSS anônimo, RSS de arquivos mapeados) em MB.
+
+    As páginas do memmap contam no RSS, mas são cache de disco que o sistema pode
+    descartar; por isso aparecem separadas da memória realmente alocada.
+    Fora do Linux, devolve o pico de RSS via resource e zero para o mapeado.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            fields = f.read().split()
+        page = os.sysconf('SC_PAGE_SIZE') / 2**20
+        resident, shared = int(fields[1]) * page, int(fields[2]) * page
+        return resident - shared, shared
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 0.0
+        except ImportError:
+            return float('nan'), float('nan')
+
+
+def generate_block(centers: np.ndarray, block: int, size: int) -> np.ndarray:
+    """Bloco determinístico (mesma semente = mesmos vetores), para gerar de novo sem guardar"""
+    rng = np.random.default_rng(1000 + block)
+    labels = rng.integers(0, len(centers), size)
+    vectors = centers[labels] + rng.normal(scale=0.35, size=(size, centers.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(centers: np.ndarray, n: int, queries: np.ndarray, k: int) -> np.ndarray:
+    """Top-k exato por força bruta, regenerando os blocos para não guardar a matriz float32"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for block, start in enumerate(range(0, n, GENERATION_BLOCK)):
+        size = min(GENERATION_BLOCK, n - start)
+        scores = queries @ generate_block(centers, block, size).T
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, np.broadcast_to(np.arange(start, start + size), (len(queries), size))], axis=1)
+        top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return best_ids
+
+
+def run(n: int, dim: int, n_queries: int, k: int, probes: list[int]):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(64, int(np.sqrt(n))), dim)).astype(np.float32)
+    queries = generate_block(centers, 10**6, n_queries)
+
+    directory = Path(tempfile.mkdtemp(prefix='ami_vectors_'))
+    try:
+        truth = exact_top_k(centers, n, queries, k)
+
+        start = time.perf_counter()
+        index = VectorIndex(directory, dim=dim)
+        for block, offset in enumerate(range(0, n, GENERATION_BLOCK)):
+            size = min(GENERATION_BLOCK, n - offset)
+            index.add(np.arange(offset, offset + size), generate_block(centers, block, size), auto_rebuild=False)
+        index.rebuild(retrain=True)
+        build_time = time.perf_counter() - start
+
+        # Reabre do disco: mede o custo real de um processo novo usando o índice
+        del index
+        anon_before, mapped_before = resident_memory_mb()
+        index = VectorIndex(directory)
+        disk_mb = sum(f.stat().st_size for f in directory.iterdir()) / 2**20
+
+        print(f'\n=== {n:,} vetores x {dim} dims ===')
+        print(f'build: {build_time:.1f}s | disco: {disk_mb:.0f} MB | listas: {len(index.centroids) if index.centroids is not None else 0}')
+        print(f'float32 em RAM (força bruta): {n * dim * 4 / 2**20:.0f} MB')
+        print(f'{"n_probe":>8} {"recall@" + str(k):>10} {"p50 ms":>8} {"p95 ms":>8} {"+anon MB":>9} {"+mmap MB":>9}')
+
+        for n_probe in probes:
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                t = time.perf_counter()
+                found = index.search(query, k=k, n_probe=n_probe)
+                latencies.append((time.perf_counter() - t) * 1000)
+                hits += len(set(i for i, _ in found) & set(expected.tolist()))
+            anon, mapped = resident_memory_mb()
+            print(
+                f'{n_probe:>8} {hits / (k * len(queries)):>10.3f} '
+                f'{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} '
+                f'{anon - anon_before:>9.0f} {mapped - mapped_before:>9.0f}'
+            )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--probes', type=int, nargs='+', default=[4, 16, 64])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.dim, args.queries, args.k, args.probes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark offline das ferramentas web, sobre um corpus gravado (sem rede e sem LM Studio)
+
+Mede cada etapa do `WebSearchEngine` em separado e de ponta a ponta:
+normalização dos resultados de pesquisa, download (frio e com cache), `_clean_html_content`,
+chunking, ranking (BM25 + embeddings falsos) e pesquisa + leitura completas.
+
+As pesquisas vêm de um `ReplaySearchClient`, as páginas de um `http.server` local e os
+embeddings de um modelo falso determinístico (ver benchmarks/fixtures.py).
+
+Uso:
+    # grava uma vez (precisa de rede)
+    python benchmarks/bench_web_tools.py --gravar --buscas "economia do brasil" "clima da amazônia"
+    # roda offline quantas vezes quiser
+    python benchmarks/bench_web_tools.py --repeat 5
+    # sem nada gravado: corpus sintético
+    python benchmarks/bench_web_tools.py --sintetico
+"""
+
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import argparse
+import requests
+import tempfile
+import shutil
+import json
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fixtures import (
+    FIXTURES_DIR, Recorder, ReplayServer, ReplaySearchClient, FakeEmbeddingModel, FakeResidency, LINK_FIELDS,
+    synthetic_fixture,
+)
+from Tools import web_search
+from Tools.web_search import WebSearchEngine, COUNTRY
+from Tools.search_client import SearchClient
+from Tools.search_store import SearchStore
+from Tools.embedding_cache import EmbeddingCache
+from Tools.page_cache import PageFetcher
+
+DEFAULT_FIXTURE = FIXTURES_DIR / 'default'
+
+
+def record(directory: Path, queries: list[str]):
+    """Roda as pesquisas de verdade e grava resultados e páginas"""
+    recorder = Recorder(directory)
+    client = SearchClient()
+    session = requests.Session()
+    for query in queries:
+        recorder.manifest['queries'].append(query)
+        # Notícias com e sem período: `pesquisar_noticias` usa a última semana, `pesquisar_tudo` não limita
+        searches = [('text', None, {'backend': backend, 'max_results': 5}) for backend in ('google', 'wikipedia')]
+        searches += [('news', timelimit, {'max_results': 4}) for timelimit in ('w', None)]
+        for category, timelimit, extra in searches:
+            try:
+                results = recorder.record_search(
+                    client, category, query=query, region=COUNTRY, safesearch='moderate', timelimit=timelimit, **extra
+                )
+            except Exception as e:
+                print(f'  {category} {query!r}: {e}')
+                continue
+            for item in results:
+                url = item.get(LINK_FIELDS[category], '')
+                try:
+                    recorder.record_page(session, url)
+                except Exception as e:
+                    print(f'  {url}: {e}')
+        print(f'{query!r}: {len(recorder.manifest["pages"])} páginas gravadas até agora')
+    recorder.save()
+
+
+def measure(fn: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """(mediana, p95) em ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+
+def run(directory: Path, repeat: int, latency: float):
+    manifest = json.loads((directory / 'manifest.json').read_text(encoding='utf-8'))
+    queries = manifest['queries']
+    bodies = [
+        (directory / 'pages' / entry['file']).read_bytes().decode('utf-8', errors='replace')
+        for entry in manifest['pages'].values() if entry['status'] == 200
+    ]
+    print(f'{directory}: {len(queries)} buscas, {len(manifest["searches"])} pesquisas, '
+          f'{len(bodies)} páginas ({sum(map(len, bodies)) / 2**20:.1f} MB)\n')
+
+    model = FakeEmbeddingModel(latency=latency)
+    web_search.residency = FakeResidency(model)
+    # Pré-carregamento em segundo plano deixaria os tempos dependentes do agendamento de threads
+    web_search.PREFETCH_ENABLED = False
+
+    scratch = Path(tempfile.mkdtemp(prefix='ami_bench_web_'))
+    rows: list[tuple[str, float, float, str]] = []
+    try:
+        with ReplayServer(directory, manifest) as server:
+            engine = WebSearchEngine()
+            engine.ddgs = ReplaySearchClient(manifest, server)
+
+            def fresh_state(name: str):
+                state = scratch / f'{name}-{time.perf_counter_ns()}'
+                engine.fetcher = PageFetcher(state / 'http')
+                engine.embedding_cache = EmbeddingCache(state)
+                engine.results = SearchStore(state / 'searches.db')
+
+            def parse_searches():
+                for query in queries:
+                    engine._ddgs_text(query, None, 'google')
+                    engine._ddgs_news(query, 'w')
+            rows.append(('pesquisa (normalização)', *measure(parse_searches, repeat), f'{2 * len(queries)} pesquisas'))
+
+            urls = [server.url_for(url) for url, entry in manifest['pages'].items() if entry['status'] == 200]
+
+            def fetch_all():
+                for url in urls:
+                    try:
+                        engine.fetcher.fetch(url)
+                    except Exception:
+                        pass
+
+            def fetch_cold():
+                fresh_state('fetch')
+                fetch_all()
+            rows.append(('download frio', *measure(fetch_cold, repeat), f'{len(urls)} páginas'))
+            before = server.requests
+            rows.append(('download com cache', *measure(fetch_all, repeat), f'{(server.requests - before) // repeat} idas ao servidor'))
+
+            rows.append(('_clean_html_content', *measure(lambda: [engine._clean_html_content(b) for b in bodies], repeat), ''))
+            texts = [engine._clean_html_content(body) for body in bodies]
+            chunked = [engine._split_text_into_chunks(text) for text in texts]
+            rows.append(('chunking', *measure(lambda: [engine._split_text_into_chunks(t) for t in texts], repeat),
+                         f'{sum(map(len, chunked))} chunks'))
+
+            def rank_all():
+                fresh_state('rank')
+                for query in queries:
+                    for chunks in chunked:
+                        engine._select_chunks(query, chunks)
+            model.embedded = 0
+            rows.append(('ranking (cache frio)', *measure(rank_all, repeat),
+                         f'{model.embedded // repeat} textos embedados'))
+
+            def end_to_end():
+                fresh_state('e2e')
+                for query in queries:
+                    engine._text_search(query, None, 'google')
+                    engine.ler_pagina_web('0', query)
+                    engine.pesquisar_tudo(query)
+            rows.append(('ponta a ponta', *measure(end_to_end, repeat), 'pesquisa + leitura + pesquisar_tudo'))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f'{"etapa":<26} {"mediana ms":>11} {"p95 ms":>9}  observação')
+    for label, median, p95, note in rows:
+        print(f'{label:<26} {median:>11.1f} {p95:>9.1f}  {note}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixture', type=Path, default=DEFAULT_FIXTURE)
+    parser.add_argument('--gravar', action='store_true', help='grava pesquisas e páginas reais no --fixture')
+    parser.add_argument('--buscas', nargs='+', default=['economia do brasil', 'clima da amazônia'])
+    parser.add_argument('--sintetico', action='store_true', help='usa um corpus gerado em vez do gravado')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latencia', type=float, default=0.0, help='segundos simulados por lote de embedding')
+    args = parser.parse_args()
+
+    if args.gravar:
+        record(args.fixture, args.buscas)
+        return
+
+    if args.sintetico:
+        directory = Path(tempfile.mkdtemp(prefix='ami_fixture_'))
+        try:
+            synthetic_fixture(directory)
+            run(directory, args.repeat, args.latencia)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return
+
+    if not (args.fixture / 'manifest.json').exists():
+        sys.exit(f'nada gravado em {args.fixture}; rode com --gravar (precisa de rede) ou use --sintetico')
+    run(args.fixture, args.repeat, args.latencia)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Gravação e reprodução offline das ferramentas web (DDGS, páginas e embeddings)
+
+- `Recorder`: roda pesquisas DDGS e downloads de verdade uma vez e grava tudo num diretório
+  (manifest.json + corpos das páginas).
+- `ReplayServer`: `http.server` local que devolve as páginas gravadas com os mesmos
+  cabeçalhos (Content-Type, ETag, Cache-Control...) e responde 304 a requisições condicionais.
+- `ReplaySearchClient`: substitui o `SearchClient`, devolvendo os resultados gravados com os
+  links apontando para o servidor local.
+- `FakeResidency`/`FakeEmbeddingModel`: embeddings determinísticos (hash de palavras), sem LM Studio.
+- `synthetic_fixture`: gera um corpus artificial no mesmo formato, para rodar sem gravar nada.
+
+Formato do diretório:
+    manifest.json  {"queries": [...], "searches": [{"category", "kwargs", "results"}],
+                    "pages": {url: {"file", "status", "headers"}}}
+    pages/<sha256 da url>.body
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Optional
+import numpy as np
+import threading
+import hashlib
+import random
+import copy
+import json
+import time
+import zlib
+import sys
+import re
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.search_client import SearchClient, NoResultsError
+from Tools.page_cache import DEFAULT_HEADERS
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+# Campo do link em cada categoria de resultado bruto do DDGS
+LINK_FIELDS = {'text': 'href', 'news': 'url', 'images': 'image', 'videos': 'content'}
+# Cabeçalhos gravados e reproduzidos (o resto não influencia o PageFetcher)
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Expires')
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def search_key(category: str, kwargs: dict[str, Any]) -> str:
+    return json.dumps([category, kwargs.get('query'), kwargs.get('backend'), kwargs.get('timelimit')])
+
+
+class Recorder:
+    """Grava pesquisas e páginas reais num diretório de fixture"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        (directory / 'pages').mkdir(parents=True, exist_ok=True)
+        manifest = directory / 'manifest.json'
+        self.manifest = json.loads(manifest.read_text(encoding='utf-8')) if manifest.exists() else {
+            'queries': [], 'searches': [], 'pages': {}
+        }
+
+    def record_search(self, client: SearchClient, category: str, **kwargs: Any) -> list[dict[str, Any]]:
+        results = client.search(category, **kwargs)
+        self.manifest['searches'].append({'category': category, 'kwargs': kwargs, 'results': copy.deepcopy(results)})
+        return results
+
+    def record_page(self, session, url: str, timeout: float = 15):
+        if url in self.manifest['pages']:
+            return
+        response = session.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+        name = f'{url_key(url)}.body'
+        (self.directory / 'pages' / name).write_bytes(response.content)
+        self.manifest['pages'][url] = {
+            'file': name,
+            'status': response.status_code,
+            'headers': {header: response.headers[header] for header in KEPT_HEADERS if header in response.headers},
+        }
+
+    def save(self):
+        (self.directory / 'manifest.json').write_text(json.dumps(self.manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+class ReplayServer:
+    """Servidor HTTP local que reproduz as páginas gravadas (porta livre escolhida pelo sistema)"""
+
+    def __init__(self, directory: Path, manifest: dict[str, Any]):
+        pages = {url_key(url): entry for url, entry in manifest['pages'].items()}
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                entry = pages.get(self.path.lstrip('/'))
+                if entry is None:
+                    self.send_error(404)
+                    return
+                headers = entry['headers']
+                if headers.get('ETag') and self.headers.get('If-None-Match') == headers['ETag']:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = (directory / 'pages' / entry['file']).read_bytes()
+                self.send_response(entry['status'])
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def url_for(self, original: str) -> str:
+        return f'{self.base_url}/{url_key(original)}'
+
+    def __enter__(self) -> 'ReplayServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class ReplaySearchClient:
+    """Mesma interface do `SearchClient`, respondendo com as pesquisas gravadas"""
+
+    def __init__(self, manifest: dict[str, Any], server: Optional[ReplayServer] = None):
+        self.calls = 0
+        self._server = server
+        self._pages = manifest['pages']
+        self._searches = {search_key(s['category'], s['kwargs']): s for s in manifest['searches']}
+
+    def search(self, category: str, **kwargs: Any) -> list[dict[str, Any]]:
+        self.calls += 1
+        recorded = self._searches.get(search_key(category, kwargs))
+        if recorded is None:
+            raise NoResultsError(f'pesquisa não gravada: {category} {kwargs.get("query")!r}')
+        results = copy.deepcopy(recorded['results'])
+        field = LINK_FIELDS.get(category)
+        if self._server and field:
+            for item in results:
+                if item.get(field) in self._pages:
+                    item[field] = self._server.url_for(item[field])
+        return results
+
+
+class FakeEmbeddingModel:
+    """Embeddings determinísticos: soma de vetores aleatórios fixos por palavra, normalizada.
+
+    `latency` (segundos por lote) imita o custo de uma ida ao servidor de embeddings.
+    """
+
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self.embedded = 0
+        self._vectors: dict[str, np.ndarray] = {}
+
+    def _word(self, word: str) -> np.ndarray:
+        if word not in self._vectors:
+            rng = np.random.default_rng(zlib.crc32(word.encode('utf-8')))
+            self._vectors[word] = rng.normal(size=self.dim).astype(np.float32)
+        return self._vectors[word]
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r'\w+', text.lower()):
+            vector += self._word(word[:6])
+        return (vector / max(float(np.linalg.norm(vector)), 1e-12)).tolist()
+
+    def embed(self, texts: str | list[str]):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(texts, str):
+            self.embedded += 1
+            return self._vector(texts)
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+
+class FakeResidency:
+    """Stand-in do `ModelResidencyManager` que só sabe entregar o modelo de embedding falso"""
+
+    def __init__(self, model: FakeEmbeddingModel):
+        self.model = model
+
+    def embedding(self, model_key: str) -> FakeEmbeddingModel:
+        return self.model
+
+
+def synthetic_fixture(directory: Path, pages: int = 12, paragraphs: int = 80, seed: int = 0) -> dict[str, Any]:
+    """Gera um corpus artificial (páginas com menu, artigo e rodapé) e as pesquisas que apontam para ele"""
+    rng = random.Random(seed)
+    topics = {
+        'economia do brasil': 'economia exportação soja minério petróleo indústria inflação juros câmbio',
+        'clima da amazônia': 'clima floresta chuva umidade temperatura desmatamento rio biodiversidade',
+        'história da independência': 'história independência império colônia portugal dom pedro grito ipiranga',
+    }
+    filler = 'também ainda sobre entre durante segundo porém assim depois antes muito pouco grande novo'.split()
+    recorder = Recorder(directory)
+    recorder.manifest = {'queries': [], 'searches': [], 'pages': {}}
+
+    for t, (query, vocabulary) in enumerate(topics.items()):
+        words = vocabulary.split() + filler
+        text_results, news_results = [], []
+        for p in range(pages // len(topics)):
+            url = f'https://exemplo{t}.com.br/artigo/{p}'
+            body = ''.join(
+                f'<p>{" ".join(rng.choice(words) for _ in range(rng.randint(30, 70))).capitalize()}, '
+                f'{" ".join(rng.choice(words) for _ in range(10))}.</p>'
+                for _ in range(paragraphs)
+            )
+            menu = ''.join(f'<li><a href="/{i}">Seção {i}</a></li>' for i in range(40))
+            html = (
+                f'<html><head><title>{query}</title><script>var x = 1;</script></head><body>'
+                f'<nav><ul>{menu}</ul></nav><div class="sidebar"><ul>{menu}</ul></div>'
+                f'<article class="post-content"><h1>{query.title()} &ndash; parte {p}</h1>{body}</article>'
+                f'<footer>&copy; exemplo</footer></body></html>'
+            ).encode('utf-8')
+            name = f'{url_key(url)}.body'
+            (directory / 'pages' / name).write_bytes(html)
+            recorder.manifest['pages'][url] = {
+                'file': name,
+                'status': 200,
+                'headers': {'Content-Type': 'text/html; charset=utf-8', 'ETag': f'"{name[:16]}"', 'Cache-Control': 'max-age=0'},
+            }
+            item = {'title': f'{query} {p}', 'body': ' '.join(rng.choice(words) for _ in range(40))}
+            text_results.append({**item, 'href': url})
+            news_results.append({**item, 'url': url, 'date': '2026-01-01T00:00:00+00:00', 'source': 'exemplo'})
+
+        recorder.manifest['queries'].append(query)
+        for backend in ('google', 'wikipedia'):
+            recorder.manifest['searches'].append({
+                'category': 'text',
+                'kwargs': {'query': query, 'backend': backend, 'timelimit': None},
+                'results': text_results[:5],
+            })
+        for timelimit in ('w', None):
+            recorder.manifest['searches'].append({
+                'category': 'news', 'kwargs': {'query': query, 'timelimit': timelimit}, 'results': news_results[:4],
+            })
+
+    recorder.save()
+    return recorder.manifest
@@ -23,9 +23,15 @@ class CLI:
         print(f'{config.colors["header"]}{config.colors["bold"]}\t\t{config.emojis["chat"]}Ami rodando!\n' + '='*50 + config.colors['default'])
 
     def is_command(self, user_input: str, command_type: str) -> bool:
-        """Verifica se a entrada do usuário contém um comando específico"""
-        commands = config.commands.get(command_type, [])
-        return any(cmd in user_input.lower() for cmd in commands)
+        """Verifica se a entrada do usuário começa com um comando específico.
+
+        Compara só a primeira palavra, inteira: o caminho em "/exportar /tmp/quick.jsonl"
+        não pode ser confundido com "/q" (sair) nem "/importar ~/clientes.csv" com "/cl".
+        """
+        words = user_input.split(maxsplit=1)
+        if not words:
+            return False
+        return words[0].lower() in config.commands.get(command_type, [])
 
     def _extract_image_command(self, user_input: str) -> tuple[str, list[str]]:
         """
@@ -153,6 +159,15 @@ class CLI:
                    self.print_header()
                    continue
                 
+                # Verifica comandos de importar/exportar memórias
+                if self.is_command(prompt, 'import_memories'):
+                    self._handle_memory_transfer(prompt, 'import')
+                    continue
+                
+                if self.is_command(prompt, 'export_memories'):
+                    self._handle_memory_transfer(prompt, 'export')
+                    continue
+                
                 # Processar entrada (incluindo imagens)
                 return self.process_user_input(prompt)
                 
@@ -193,6 +208,40 @@ class CLI:
         except KeyboardInterrupt:
             print(f'\n{config.colors["info"]}Operação cancelada{config.colors["default"]}')
 
+    def _handle_memory_transfer(self, user_input: str, mode: str):
+        """Manipula os comandos de importar/exportar memórias (JSONL ou CSV)"""
+        from Tools.memory import MemorySystem
+        import time
+
+        # Caminho depois do comando, com ou sem aspas
+        match = re.search(r'/\w+\s+(?:"([^"]+)"|(\S+))', user_input)
+        if not match:
+            print(f'{config.colors["warning"]}{config.emojis["warning"]}Uso: /importar caminho/memorias.jsonl | /exportar caminho/memorias.csv{config.colors["default"]}')
+            return
+
+        path = Path(match.group(1) or match.group(2)).expanduser()
+        if mode == 'import' and not path.is_file():
+            print(f'{config.colors["error"]}{config.emojis["error"]}Arquivo não encontrado: {path}{config.colors["default"]}')
+            return
+
+        def show_progress(total: int):
+            print(f'\r{config.emojis["loading"]}{config.colors["dim"]}{total} memória(s) processada(s)...{config.colors["default"]}', end='', flush=True)
+
+        try:
+            start = time.perf_counter()
+            memory = MemorySystem()
+            if mode == 'import':
+                total = memory.import_memories(path, on_progress=show_progress)
+                action = 'importada(s) de'
+            else:
+                total = memory.export_memories(path, on_progress=show_progress)
+                action = 'exportada(s) para'
+
+            elapsed = time.perf_counter() - start
+            print(f'\n{config.emojis["success"]}{config.colors["success"]}{total} memória(s) {action} {path} em {elapsed:.1f}s{config.colors["default"]}')
+        except Exception as e:
+            print(f'\n{config.colors["error"]}{config.emojis["error"]}Erro ao transferir memórias: {str(e)}{config.colors["default"]}')
+
     def _handle_show_history(self):
         """Manipula comando de mostrar histórico"""
         
@@ -3,7 +3,7 @@ from interface import CLI
 from config import config
 from pathlib import Path
 import lmstudio as lms
-from Tools import ToolRegistry
+from Tools import ToolRegistry, residency
 from time import sleep
 import json
 
@@ -17,15 +17,18 @@ MessageType = Union[lms.AssistantResponse, lms.ToolResultMessage, lms.UserMessag
 # ---------------------
 
 # -- Main components --
-print(f'{config.emojis['loading']}{config.colors['dim']}Carregando modelo...{config.colors['default']}')
-client = lms.Client(config.host)
-model = client.llm.model(
-    MODEL,
-    config=LOAD_CONFIG
-)
-chat = lms.Chat()
-cli = CLI()
-tools = ToolRegistry.get_all_tools()
+# Só no processo principal: os workers do ToolRegistry (multiprocessing com spawn) reimportam este arquivo
+if __name__ == '__main__':
+    print(f'{config.emojis['loading']}{config.colors['dim']}Carregando modelo...{config.colors['default']}')
+    # Mesma conexão usada pelas ferramentas; o modelo principal fica fixado (nunca é descarregado)
+    model = residency.llm(
+        MODEL,
+        load_config=LOAD_CONFIG,
+        pin=True
+    )
+    chat = lms.Chat()
+    cli = CLI()
+    tools = ToolRegistry.get_all_tools()
 # ---------------------
 
 def get_history_full() -> dict[str, list[Any]]:
@@ -0,0 +1,33 @@
+"""
+Tokenização do BM25: stopwords são comparadas já sem acento, como os tokens
+"""
+
+from pathlib import Path
+import unittest
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Tools.bm25 import tokenize, bm25_scores, STOPWORDS
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_stopwords_acentuadas_sao_removidas(self):
+        self.assertEqual(tokenize('não é'), [])
+        self.assertEqual(tokenize('Isso NÃO é às vezes'), ['isso', 'vezes'])
+
+    def test_stopwords_ficam_sem_acento(self):
+        self.assertIn('nao', STOPWORDS)
+        self.assertNotIn('não', STOPWORDS)
+
+    def test_acento_e_prefixo(self):
+        self.assertEqual(tokenize('Econômico economia'), ['econom', 'econom'])
+
+
+class Bm25ScoresTest(unittest.TestCase):
+    def test_stopword_nao_pontua(self):
+        scores = bm25_scores('não', ['não sei', 'talvez'])
+        self.assertFalse(scores.any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""
+Reconhecimento de comandos do CLI: só a primeira palavra, inteira, conta como comando
+"""
+
+from pathlib import Path
+import unittest
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from interface.CLI import CLI
+
+
+class IsCommandTest(unittest.TestCase):
+    def setUp(self):
+        self.cli = CLI()
+
+    def test_comando_exato(self):
+        self.assertTrue(self.cli.is_command('/q', 'exit'))
+        self.assertTrue(self.cli.is_command('/SAIR', 'exit'))
+        self.assertTrue(self.cli.is_command('  /hist  ', 'show_history'))
+
+    def test_caminho_com_alias_de_outro_comando(self):
+        # "/tmp/quick.jsonl" contém "/q" e "~/clientes.csv" contém "/cl"
+        self.assertTrue(self.cli.is_command('/exportar /tmp/quick.jsonl', 'export_memories'))
+        self.assertFalse(self.cli.is_command('/exportar /tmp/quick.jsonl', 'exit'))
+        self.assertTrue(self.cli.is_command('/importar ~/clientes.csv', 'import_memories'))
+        self.assertFalse(self.cli.is_command('/importar ~/clientes.csv', 'clear'))
+        self.assertFalse(self.cli.is_command('/importar dados/historico.jsonl', 'show_history'))
+
+    def test_comando_no_meio_do_texto_nao_conta(self):
+        self.assertFalse(self.cli.is_command('o que faz o /q?', 'exit'))
+        self.assertFalse(self.cli.is_command('', 'exit'))
+
+
+if __name__ == '__main__':
+    unittest.main()